@@ -17,6 +17,13 @@ PITCH_TOLERANCE = 50  # 50 cents = half a semitone
 # Prefer lower fret positions (more playable)
 FRET_PENALTY_WEIGHT = 0.5  # Penalty increases with fret number
 
+# Frequency range mapped onto the fretboard (after octave correction)
+GUITAR_MIN_FREQ = 80
+GUITAR_MAX_FREQ = 1200
+
+# Pitch frames at or below this confidence are treated as noise
+MIN_CONFIDENCE = 0.5
+
 # Phase 2: Video Analysis Config
 # Fretboard detection
 FRETBOARD_MIN_AREA_RATIO = 0.15  # Minimum 15% of frame
@@ -24,10 +31,41 @@ FRETBOARD_MAX_AREA_RATIO = 0.80  # Maximum 80% of frame
 FRETBOARD_ASPECT_RATIO_MIN = 1.5  # Width should be > 1.5x height
 FRETBOARD_ASPECT_RATIO_MAX = 6.0  # Width should be < 6x height
 
+# Nut-to-saddle (scale) length as a fraction of the fretboard bbox width;
+# below 1 because the camera does not see the full neck
+FRET_SCALE_RATIO = 0.85
+
 # String detection
 STRING_DETECTION_SENSITIVITY = 30  # Hough transform threshold
 STRING_MIN_LENGTH_RATIO = 0.3  # Minimum 30% of fretboard width
 
 # Calibration
 CALIBRATION_FRAMES_REQUIRED = 5  # Number of frames needed for calibration
-CALIBRATION_CONSISTENCY_THRESHOLD = 0.8  # 80% agreement required
\ No newline at end of file
+CALIBRATION_CONSISTENCY_THRESHOLD = 0.8  # 80% agreement required
+
+# Phase 3: Packed note representation for vectorized fusion
+# Missing string/fret are stored as -1, missing confidence as NaN
+NOTE_DTYPE = [
+    ('time', 'f8'),
+    ('string', 'i1'),
+    ('fret', 'i1'),
+    ('frequency', 'f8'),
+    ('confidence', 'f8'),
+    ('source', 'u1'),  # Index into NOTE_SOURCES
+]
+
+# Note source labels; the position in this tuple is the packed source code
+NOTE_SOURCES = (
+    'unknown',
+    'audio',
+    'video',
+    'fused',
+    'audio_only',
+    'video_only',
+    'octave_corrected',
+    'position_corrected',
+    'audio_priority',
+    'video_priority',
+    'audio_weighted',
+    'video_weighted',
+)
@@ -2,9 +2,12 @@
 """
 Debug script to see what's happening at each stage
 """
+import logging
 import sys
 from pathlib import Path
+import numpy as np
 from src.pipeline import TranscriptionPipeline
+from src.fusion.note_array import pack_notes, source_label
 
 
 def debug_pipeline(video_path: str):
@@ -50,20 +53,20 @@ def debug_pipeline(video_path: str):
     else:
         print("  None detected")
     
+    # One pass over the fused notes; all statistics below come from this array
+    fused = pack_notes(result['fused_notes'] or [])
+    
     # Fused notes
     print("\n[3] FUSED NOTES:")
     if result['fused_notes']:
-        print(f"  Total: {len(result['fused_notes'])}")
+        print(f"  Total: {len(fused)}")
         
         # Analyze by source
-        sources = {}
-        for note in result['fused_notes']:
-            source = note.get('source', 'unknown')
-            sources[source] = sources.get(source, 0) + 1
+        source_codes, source_counts = np.unique(fused['source'], return_counts=True)
         
         print(f"  Sources breakdown:")
-        for source, count in sources.items():
-            print(f"    {source}: {count}")
+        for code, count in zip(source_codes, source_counts):
+            print(f"    {source_label(code)}: {count}")
         
         print(f"\n  Sample (first 10):")
         for i, note in enumerate(result['fused_notes'][:10]):
@@ -77,17 +80,17 @@ def debug_pipeline(video_path: str):
     # Analyze confidence distribution
     print("\n[4] CONFIDENCE ANALYSIS:")
     if result['fused_notes']:
-        confidences = [n.get('confidence', 0) for n in result['fused_notes']]
-        print(f"  Min: {min(confidences):.3f}")
-        print(f"  Max: {max(confidences):.3f}")
-        print(f"  Avg: {sum(confidences)/len(confidences):.3f}")
+        confidences = np.nan_to_num(fused['confidence'], nan=0.0)
+        print(f"  Min: {confidences.min():.3f}")
+        print(f"  Max: {confidences.max():.3f}")
+        print(f"  Avg: {confidences.mean():.3f}")
         
         # Count by confidence ranges
         ranges = {
-            'Very High (>0.8)': sum(1 for c in confidences if c > 0.8),
-            'High (0.6-0.8)': sum(1 for c in confidences if 0.6 <= c <= 0.8),
-            'Medium (0.4-0.6)': sum(1 for c in confidences if 0.4 <= c <= 0.6),
-            'Low (<0.4)': sum(1 for c in confidences if c < 0.4),
+            'Very High (>0.8)': int(np.count_nonzero(confidences > 0.8)),
+            'High (0.6-0.8)': int(np.count_nonzero((confidences >= 0.6) & (confidences <= 0.8))),
+            'Medium (0.4-0.6)': int(np.count_nonzero((confidences >= 0.4) & (confidences <= 0.6))),
+            'Low (<0.4)': int(np.count_nonzero(confidences < 0.4)),
         }
         print(f"  Distribution:")
         for range_name, count in ranges.items():
@@ -127,6 +130,9 @@ def debug_pipeline(video_path: str):
 
 
 if __name__ == "__main__":
+    # Pipeline progress goes through logging; show it as plain lines
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     if len(sys.argv) < 2:
         print("Usage: python debug_fusion.py <video_file>")
         sys.exit(1)
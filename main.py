@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 import argparse
+import logging
 from pathlib import Path
-from src.pipeline import TranscriptionPipeline
 
 def main():
     parser = argparse.ArgumentParser(description='Guitar Tab Transcriber - Phase 1')
     parser.add_argument('input', type=str, help='Input audio or video file')
     parser.add_argument('-o', '--output', type=str, help='Output tab file (default: auto-generated)')
     parser.add_argument('--format', choices=['txt', 'ascii'], default='txt', help='Output format')
+    parser.add_argument('--quality', choices=['draft', 'final'], default='final',
+                        help='Pitch detection quality (draft is faster, skips Viterbi smoothing)')
     
     args = parser.parse_args()
     
+    # Imported after argument parsing so --help doesn't load the ML stack
+    from src.pipeline import TranscriptionPipeline
+    
     # Initialize pipeline
-    pipeline = TranscriptionPipeline()
+    pipeline = TranscriptionPipeline(pitch_quality=args.quality)
     
     # Process
     print(f"Processing: {args.input}")
@@ -26,4 +31,6 @@ def main():
     print(f"Tab saved to: {output_path}")
 
 if __name__ == "__main__":
+    # Pipeline progress goes through logging; show it as plain lines
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     main()
\ No newline at end of file
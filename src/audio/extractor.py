@@ -1,17 +1,24 @@
 """
 Audio extraction from video/audio files
 """
+import logging
 import numpy as np
-import librosa
-from pathlib import Path
-from pydub import AudioSegment
+import subprocess
 import tempfile
-import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
 
 
 class AudioExtractor:
     """Extract and preprocess audio from various file formats"""
     
+    # Formats libsndfile decodes natively (no audioread/ffmpeg needed)
+    SOUNDFILE_FORMATS = {'.wav', '.flac', '.ogg'}
+    
+    # Containers that always need ffmpeg to pull the audio track out
+    VIDEO_FORMATS = {'.mp4', '.avi', '.mov', '.mkv'}
+    
     def __init__(self, target_sr=22050):
         """
         Args:
@@ -30,51 +37,227 @@ class AudioExtractor:
             Tuple of (audio_data, sample_rate)
         """
         file_path = Path(file_path)
+        suffix = file_path.suffix.lower()
         
         try:
-            # First try librosa directly for audio files
-            audio, sr = librosa.load(str(file_path), sr=self.target_sr, mono=True)
-            
-            # Normalize audio
-            audio = librosa.util.normalize(audio)
-            
-            return audio, sr
+            if suffix in self.VIDEO_FORMATS:
+                audio = self._decode_with_ffmpeg(file_path)
+            else:
+                audio = self._load_audio_file(file_path, suffix)
+        except Exception as e:
+            raise RuntimeError(f"Failed to extract audio from {file_path}: {e}")
+        
+        # Normalize audio
+        audio = self._normalize(audio)
+        
+        return audio, self.target_sr
+    
+    def iter_chunks(self, file_path: Path, window: float = 10.0, overlap: float = 0.05):
+        """
+        Decode audio as a stream of overlapping windows
+        
+        Only about one window of samples is held at a time, so memory stays
+        flat regardless of the file's length. Unlike extract(), chunks are not
+        peak-normalized (that needs the whole file); pitch detection
+        normalizes every frame itself and onset strength is a difference of
+        log powers, so neither depends on the overall gain.
+        
+        Args:
+            file_path: Path to audio or video file
+            window: Chunk length in seconds
+            overlap: Overlap between consecutive chunks in seconds
             
+        Yields:
+            (audio_chunk, start_time) with start_time in seconds
+        """
+        file_path = Path(file_path)
+        window_len = int(window * self.target_sr)
+        overlap_len = int(overlap * self.target_sr)
+        hop = window_len - overlap_len
+        
+        buffer = np.zeros(0, dtype=np.float32)
+        start = 0  # Sample index of buffer[0]
+        
+        try:
+            for block in self._iter_blocks(file_path, hop):
+                buffer = np.concatenate((buffer, block))
+                
+                while len(buffer) >= window_len:
+                    yield buffer[:window_len], start / self.target_sr
+                    buffer = buffer[hop:]
+                    start += hop
         except Exception as e:
-            # If librosa fails (e.g., for video files), use pydub with ffmpeg
+            raise RuntimeError(f"Failed to extract audio from {file_path}: {e}")
+        
+        # Whatever is left past the previous chunk's overlap
+        if len(buffer) > overlap_len or (start == 0 and len(buffer) > 0):
+            yield buffer, start / self.target_sr
+        elif start == 0:
+            raise RuntimeError(f"Failed to extract audio from {file_path}: no audio samples decoded")
+    
+    def _iter_blocks(self, file_path: Path, blocksize: int):
+        """Yield consecutive mono float32 blocks at target_sr, about blocksize samples each"""
+        suffix = file_path.suffix.lower()
+        
+        if suffix in self.SOUNDFILE_FORMATS:
+            import soundfile as sf
+            
             try:
-                print(f"Librosa failed, trying pydub with ffmpeg for {file_path}...")
-                
-                # Load the video/audio file with pydub
-                if file_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-                    # For video files
-                    audio_segment = AudioSegment.from_file(str(file_path), format=file_path.suffix[1:])
-                else:
-                    # For audio files
-                    audio_segment = AudioSegment.from_file(str(file_path))
-                
-                # Convert to mono
-                if audio_segment.channels > 1:
-                    audio_segment = audio_segment.set_channels(1)
-                
-                # Export to temporary WAV file that librosa can read
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                    temp_path = temp_wav.name
-                    audio_segment.export(temp_path, format='wav')
+                sound_file = sf.SoundFile(str(file_path))
+            except Exception:
+                logger.warning(f"Direct decode failed, decoding with ffmpeg for {file_path}...")
+            else:
+                with sound_file:
+                    yield from self._stream_soundfile(sound_file, blocksize)
+                return
+        
+        yield from self._stream_with_ffmpeg(file_path, blocksize)
+    
+    def _stream_soundfile(self, sound_file, blocksize: int):
+        """Streaming counterpart of _load_with_soundfile"""
+        import soxr
+        
+        sr = sound_file.samplerate
+        resampler = soxr.ResampleStream(sr, self.target_sr, 1, dtype='float32') if sr != self.target_sr else None
+        
+        for block in sound_file.blocks(blocksize=max(1, int(blocksize * sr / self.target_sr)),
+                                       dtype='float32', always_2d=True):
+            # Downmix to mono
+            block = block.mean(axis=1, dtype=np.float32)
+            
+            if resampler is not None:
+                block = resampler.resample_chunk(block)
+            yield block
+        
+        # Flush the resampler's delay line
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+    
+    def _stream_with_ffmpeg(self, file_path: Path, blocksize: int):
+        """Streaming counterpart of _decode_with_ffmpeg (reads stdout block by block)"""
+        command = [
+            'ffmpeg', '-nostdin', '-v', 'error',
+            '-i', str(file_path),
+            '-vn',                      # Ignore any video streams
+            '-f', 's16le',              # Raw little-endian int16 (half the bytes of f32)
+            '-ac', '1',                 # Mono
+            '-ar', str(self.target_sr),
+            '-'
+        ]
+        
+        # stderr goes to a file, not a pipe: nobody reads it until stdout ends,
+        # so a full stderr pipe would stall ffmpeg while we wait on stdout
+        stderr = tempfile.TemporaryFile()
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        
+        try:
+            while True:
+                data = proc.stdout.read(blocksize * 2)
+                if not data:
+                    break
                 
-                try:
-                    # Load with librosa
-                    audio, sr = librosa.load(temp_path, sr=self.target_sr, mono=True)
-                    
-                    # Normalize audio
-                    audio = librosa.util.normalize(audio)
-                    
-                    return audio, sr
-                    
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                        
-            except Exception as e2:
-                raise RuntimeError(f"Failed to extract audio from {file_path}: {e2}")
\ No newline at end of file
+                # An odd byte count can only happen at EOF of a truncated stream
+                samples = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+                yield samples * np.float32(1.0 / 32768)
+            
+            if proc.wait() != 0:
+                stderr.seek(0)
+                message = stderr.read().decode(errors='replace').strip()
+                raise RuntimeError(f"ffmpeg exited with code {proc.returncode}: {message}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            stderr.close()
+    
+    def _normalize(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Peak-normalize audio to [-1, 1]
+        
+        Scales in place when the buffer is writable, so no second
+        full-length array is allocated. Silent audio is returned unchanged.
+        """
+        audio = audio.astype(np.float32, copy=False)
+        
+        if audio.size == 0:
+            return audio
+        
+        # Two reductions instead of np.abs(), which would allocate a temporary
+        peak = max(float(audio.max()), -float(audio.min()))
+        if peak <= 0:
+            return audio
+        
+        if audio.flags.writeable:
+            audio *= 1.0 / peak
+            return audio
+        
+        # e.g. np.frombuffer over ffmpeg's output bytes
+        return audio * np.float32(1.0 / peak)
+    
+    def _load_audio_file(self, file_path: Path, suffix: str) -> np.ndarray:
+        """Load a plain audio file, falling back to ffmpeg if the fast path fails"""
+        try:
+            if suffix in self.SOUNDFILE_FORMATS:
+                return self._load_with_soundfile(file_path)
+            
+            import librosa
+            audio, _ = librosa.load(str(file_path), sr=self.target_sr, mono=True)
+            return audio
+            
+        except Exception:
+            logger.warning(f"Direct decode failed, decoding with ffmpeg for {file_path}...")
+            return self._decode_with_ffmpeg(file_path)
+    
+    def _load_with_soundfile(self, file_path: Path) -> np.ndarray:
+        """
+        Read with libsndfile and resample with soxr
+        
+        This is what librosa.load ends up doing for these formats, minus its
+        Python-level dispatch and audioread probing.
+        """
+        import soundfile as sf
+        import soxr
+        
+        audio, sr = sf.read(str(file_path), dtype='float32', always_2d=False)
+        
+        # Downmix to mono
+        if audio.ndim == 2:
+            audio = audio.mean(axis=1)
+        
+        if sr != self.target_sr:
+            audio = soxr.resample(audio, sr, self.target_sr)
+        
+        return audio
+    
+    def _decode_with_ffmpeg(self, file_path: Path) -> np.ndarray:
+        """
+        Decode any ffmpeg-readable file straight to mono float32 PCM
+        
+        ffmpeg downmixes and resamples to target_sr itself and streams raw
+        16-bit samples over stdout, so no intermediate WAV file is written.
+        """
+        command = [
+            'ffmpeg', '-nostdin', '-v', 'error',
+            '-i', str(file_path),
+            '-vn',                      # Ignore any video streams
+            '-f', 's16le',              # Raw little-endian int16 (half the bytes of f32)
+            '-ac', '1',                 # Mono
+            '-ar', str(self.target_sr),
+            '-'
+        ]
+        
+        proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        
+        if proc.returncode != 0:
+            message = proc.stderr.decode(errors='replace').strip()
+            raise RuntimeError(f"ffmpeg exited with code {proc.returncode}: {message}")
+        
+        samples = np.frombuffer(proc.stdout, dtype=np.int16)
+        
+        if samples.size == 0:
+            raise RuntimeError("ffmpeg produced no audio samples")
+        
+        # The int16 range is known, so one scaling pass gives float32 in [-1, 1)
+        # (and a writable buffer that _normalize can rescale in place)
+        return samples * np.float32(1.0 / 32768)
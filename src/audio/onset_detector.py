@@ -2,16 +2,23 @@
 Onset detection using librosa
 """
 import numpy as np
-import librosa
 
 
 class OnsetDetector:
     """Detect note onsets (attack times) in audio"""
     
-    def __init__(self):
-        pass
+    def __init__(self, hop_length=512, n_fft=2048, lag=1):
+        """
+        Args:
+            hop_length: STFT hop in samples (librosa's default)
+            n_fft: STFT window in samples (librosa's default)
+            lag: Frames between the spectra onset strength compares (librosa's default)
+        """
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.lag = lag
     
-    def detect(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    def detect(self, audio: np.ndarray, sample_rate: int) -> tuple:
         """
         Detect onset times in audio
         
@@ -20,19 +27,75 @@ class OnsetDetector:
             sample_rate: Sample rate of audio
             
         Returns:
-            Array of onset times in seconds
+            Tuple of (onset times in seconds, onset strength envelope with
+            one value per hop_length samples)
         """
+        onset_env = self.onset_strength(audio, sample_rate)
+        onset_frames = self.pick_onsets(onset_env, sample_rate)
+        
+        # Convert frames to time (frame i starts at i * hop_length samples)
+        onset_times = onset_frames * (self.hop_length / sample_rate)
+        
+        return onset_times, onset_env
+    
+    def onset_strength(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Compute the onset strength envelope of audio
+        
+        Args:
+            audio: Audio signal array
+            sample_rate: Sample rate of audio
+            
+        Returns:
+            Onset strength envelope with one value per hop_length samples
+        """
+        import librosa
+        
+        # Single STFT pass; everything below is derived from it
+        power_spectrogram = np.abs(librosa.stft(audio, n_fft=self.n_fft, hop_length=self.hop_length)) ** 2
+        
+        # Same features onset_strength(y=...) builds internally (log-power mel)
+        mel = librosa.feature.melspectrogram(S=power_spectrogram, sr=sample_rate)
+        
         # Compute onset strength envelope
-        onset_env = librosa.onset.onset_strength(y=audio, sr=sample_rate)
+        onset_env = librosa.onset.onset_strength(
+            S=librosa.power_to_db(mel),
+            sr=sample_rate,
+            n_fft=self.n_fft,
+            hop_length=self.hop_length,
+            lag=self.lag
+        )
+        
+        return onset_env
+    
+    def edge_seconds(self, sample_rate: int) -> float:
+        """
+        Stretch at either end of the audio whose envelope frames see padding
+        
+        Frames there come from zero-padded STFT windows or from the zero
+        frames onset_strength inserts at the start for lag and centering.
+        """
+        return (self.n_fft + self.lag * self.hop_length) / sample_rate
+    
+    def pick_onsets(self, onset_env: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Peak-pick onsets from an onset strength envelope
         
-        # Detect onsets
-        onset_frames = librosa.onset.onset_detect(
+        The envelope is normalized to its own maximum before peak picking, so
+        pass the whole recording's envelope, not one piece at a time.
+        
+        Args:
+            onset_env: Onset strength envelope from onset_strength()
+            sample_rate: Sample rate of the analyzed audio
+            
+        Returns:
+            Indices of the onset frames in onset_env
+        """
+        import librosa
+        
+        return librosa.onset.onset_detect(
             onset_envelope=onset_env,
             sr=sample_rate,
+            hop_length=self.hop_length,
             units='frames'
         )
-        
-        # Convert frames to time
-        onset_times = librosa.frames_to_time(onset_frames, sr=sample_rate)
-        
-        return onset_times
\ No newline at end of file
@@ -1,23 +1,63 @@
 """
 Pitch detection using CREPE
 """
+from dataclasses import dataclass
 import numpy as np
-import crepe
+from config.guitar_config import MIN_CONFIDENCE
+
+# Sample rate the CREPE network runs at; other rates are resampled first
+CREPE_SAMPLE_RATE = 16000
+
+# Samples in each CREPE input frame (frames are centered on their time)
+CREPE_WINDOW = 1024
+
+
+@dataclass
+class PitchTrack:
+    """Frame-level pitch track stored as parallel arrays sorted by time"""
+    frequencies: np.ndarray
+    confidences: np.ndarray
+    times: np.ndarray
+    
+    def __iter__(self):
+        # Keeps `frequencies, confidences, times = track` unpacking working
+        return iter((self.frequencies, self.confidences, self.times))
+    
+    def __len__(self) -> int:
+        return len(self.times)
+    
+    def window(self, start_time: float, end_time: float) -> slice:
+        """
+        Locate the frames with start_time <= time < end_time
+        
+        Returns:
+            Slice usable on all three arrays (indexing with it yields views)
+        """
+        start, end = np.searchsorted(self.times, [start_time, end_time], side='left')
+        return slice(int(start), int(end))
 
 
 class PitchDetector:
     """Detect pitches in audio using CREPE model"""
     
-    def __init__(self, model_capacity='tiny', step_size=10):
+    def __init__(self, model_capacity='tiny', step_size=None, mode='final'):
         """
         Args:
             model_capacity: CREPE model size ('tiny', 'small', 'medium', 'large', 'full')
             step_size: Time step in milliseconds between predictions
+                       (defaults to 10 for 'final', 20 for 'draft')
+            mode: 'final' for Viterbi-smoothed tracking, 'draft' for a fast
+                  preview without Viterbi decoding at half the frame rate
         """
+        if mode not in ('draft', 'final'):
+            raise ValueError(f"Unknown pitch detection mode: {mode}")
+        
         self.model_capacity = model_capacity
-        self.step_size = step_size
+        self.mode = mode
+        self.viterbi = mode == 'final'
+        self.step_size = step_size or (10 if mode == 'final' else 20)
     
-    def detect(self, audio: np.ndarray, sample_rate: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    def detect(self, audio: np.ndarray, sample_rate: int) -> PitchTrack:
         """
         Detect pitches in audio signal
         
@@ -26,19 +66,38 @@ class PitchDetector:
             sample_rate: Sample rate of audio
             
         Returns:
-            Tuple of (frequencies, confidences, times)
+            PitchTrack of (frequencies, confidences, times)
         """
-        # Use CREPE for pitch detection
+        # crepe.predict would resample every block with resampy; convert
+        # once up front with soxr instead
+        if sample_rate != CREPE_SAMPLE_RATE:
+            import soxr
+            audio = soxr.resample(audio, sample_rate, CREPE_SAMPLE_RATE)
+            sample_rate = CREPE_SAMPLE_RATE
+        
+        times, frequencies, confidences = self._predict(audio, sample_rate)
+        
+        # Filter out low-confidence predictions
+        mask = confidences > MIN_CONFIDENCE
+        
+        return PitchTrack(frequencies[mask], confidences[mask], times[mask])
+    
+    def edge_seconds(self) -> float:
+        """Stretch at either end of the audio whose frames see padding"""
+        return CREPE_WINDOW / CREPE_SAMPLE_RATE
+    
+    def _predict(self, audio: np.ndarray, sample_rate: int) -> tuple:
+        """Run CREPE over one block of audio"""
+        # Imported lazily: crepe pulls in TensorFlow, which takes seconds to load
+        import crepe
+        
+        # Use CREPE for pitch detection (one batched call over the whole block)
         times, frequencies, confidences, _ = crepe.predict(
             audio,
             sample_rate,
             model_capacity=self.model_capacity,
             step_size=self.step_size,
-            viterbi=True  # Use Viterbi decoding for smoother pitch tracking
+            viterbi=self.viterbi  # Viterbi decoding smooths the track but is O(T·F²)
         )
         
-        # Filter out low-confidence predictions
-        confidence_threshold = 0.5
-        mask = confidences > confidence_threshold
-        
-        return frequencies[mask], confidences[mask], times[mask]
\ No newline at end of file
+        return times, frequencies, confidences
@@ -1,8 +1,37 @@
 """
 Confidence scoring for audio and video predictions - Phase 3.1
 """
+from collections import namedtuple
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+from config.guitar_config import STANDARD_TUNING, NUM_STRINGS, NUM_FRETS
+from src.fusion.note_array import pack_notes
+
+# Semitone offset from A of each natural note, indexed by letter (A..G)
+_NOTE_OFFSETS = np.array([0, 2, -9, -7, -5, -4, -2], dtype=np.int8)
+
+
+def _semitones_from_a4(note: str, octave: int) -> int:
+    """Semitone distance of a note name (e.g. 'F#') and octave from A4"""
+    offset = int(_NOTE_OFFSETS[ord(note[0]) - ord('A')])
+    if note.endswith('#'):
+        offset += 1
+    
+    return offset + (octave - 4) * 12
+
+
+# Open-string frequencies (A4 = 440 Hz) and the full position table derived
+# from them; shared by every scorer instance
+_STRING_BASE_FREQS = np.array(
+    [440.0 * 2 ** (_semitones_from_a4(note, octave) / 12) for note, octave in STANDARD_TUNING[:NUM_STRINGS]]
+)
+_FRET_FREQS = _STRING_BASE_FREQS[:, None] * 2 ** (np.arange(NUM_FRETS + 1) / 12)[None, :]
+
+# Result of comparing an audio and a video prediction
+Comparison = namedtuple(
+    'Comparison',
+    'string_match fret_match frequency_diff_cents agreement audio_freq video_freq'
+)
 
 
 class ConfidenceScorer:
@@ -27,6 +56,20 @@ class ConfidenceScorer:
                 'calibration_quality': 0.2
             }
         }
+        
+        # Flat copies of the weights for the scoring hot path (one attribute
+        # load instead of two dict lookups per term); self.weights is kept
+        # for introspection and logging
+        self.w_audio_pitch = self.weights['audio']['pitch_confidence']
+        self.w_audio_onset = self.weights['audio']['onset_clarity']
+        self.w_audio_stability = self.weights['audio']['frequency_stability']
+        self.w_video_hand = self.weights['video']['hand_detection']
+        self.w_video_mapping = self.weights['video']['finger_mapping']
+        self.w_video_picking = self.weights['video']['picking_detection']
+        self.w_video_calibration = self.weights['video']['calibration_quality']
+        
+        # Expected frequency of every string/fret position, looked up per note pair
+        self.fret_freqs = _FRET_FREQS
     
     def score_audio_prediction(self, audio_note: Dict, context: Dict) -> float:
         """
@@ -44,24 +87,54 @@ class ConfidenceScorer:
         # Pitch detection confidence (from CREPE)
         if 'confidence' in audio_note:
             pitch_conf = audio_note['confidence']
-            scores.append(pitch_conf * self.weights['audio']['pitch_confidence'])
+            scores.append(pitch_conf * self.w_audio_pitch)
+        
+        scores.extend(self._audio_context_scores(context))
+        
+        # Default weights if context missing
+        if not scores:
+            return audio_note.get('confidence', 0.5)
+        
+        return sum(scores)
+    
+    def score_audio_batch(self, audio_notes: Union[List[Dict], np.ndarray], context: Dict) -> np.ndarray:
+        """
+        Score many audio notes at once
+        
+        The context terms are shared by every note, so they are computed once
+        and only the per-note pitch confidence is handled as an array.
+        
+        Args:
+            audio_notes: Note dictionaries or a packed note array
+            context: Additional context shared by all notes
+        
+        Returns:
+            Array of confidence scores, same values as score_audio_prediction
+        """
+        has_conf, conf = self._confidence_arrays(audio_notes)
+        return self._combine_batch_scores(
+            has_conf,
+            conf * self.w_audio_pitch,
+            self._audio_context_scores(context),
+            default=0.5
+        )
+    
+    def _audio_context_scores(self, context: Dict) -> List[float]:
+        """Weighted score terms for the audio context (shared by all notes)"""
+        scores = []
         
         # Onset clarity (how distinct the note start is)
         if 'onset_strength' in context:
             onset_clarity = min(1.0, context['onset_strength'] / 10.0)
-            scores.append(onset_clarity * self.weights['audio']['onset_clarity'])
+            scores.append(onset_clarity * self.w_audio_onset)
         
         # Frequency stability (less variation = more confident)
         if 'frequency_variance' in context:
             variance = context['frequency_variance']
             stability = 1.0 / (1.0 + variance / 10.0)  # Lower variance = higher score
-            scores.append(stability * self.weights['audio']['frequency_stability'])
+            scores.append(stability * self.w_audio_stability)
         
-        # Default weights if context missing
-        if not scores:
-            return audio_note.get('confidence', 0.5)
-        
-        return sum(scores)
+        return scores
     
     def score_video_prediction(self, video_note: Dict, context: Dict) -> float:
         """
@@ -79,35 +152,84 @@ class ConfidenceScorer:
         # Hand detection confidence
         if 'confidence' in video_note:
             hand_conf = video_note['confidence']
-            scores.append(hand_conf * self.weights['video']['hand_detection'])
+            scores.append(hand_conf * self.w_video_hand)
+        
+        scores.extend(self._video_context_scores(context))
+        
+        # Default if context missing
+        if not scores:
+            return video_note.get('confidence', 0.6)
+        
+        return sum(scores)
+    
+    def score_video_batch(self, video_notes: Union[List[Dict], np.ndarray], context: Dict) -> np.ndarray:
+        """
+        Score many video notes at once
+        
+        Args:
+            video_notes: Note dictionaries or a packed note array
+            context: Additional context shared by all notes
+        
+        Returns:
+            Array of confidence scores, same values as score_video_prediction
+        """
+        has_conf, conf = self._confidence_arrays(video_notes)
+        return self._combine_batch_scores(
+            has_conf,
+            conf * self.w_video_hand,
+            self._video_context_scores(context),
+            default=0.6
+        )
+    
+    def _video_context_scores(self, context: Dict) -> List[float]:
+        """Weighted score terms for the video context (shared by all notes)"""
+        scores = []
         
         # Finger mapping quality (is position unambiguous?)
         if 'position_clarity' in context:
             mapping_quality = context['position_clarity']
-            scores.append(mapping_quality * self.weights['video']['finger_mapping'])
+            scores.append(mapping_quality * self.w_video_mapping)
         
         # Picking detection (did we see the string being played?)
         if 'picking_detected' in context:
             picking_conf = 1.0 if context['picking_detected'] else 0.3
-            scores.append(picking_conf * self.weights['video']['picking_detection'])
+            scores.append(picking_conf * self.w_video_picking)
         
         # Calibration quality
         if 'calibration_quality' in context:
             calib_quality = context['calibration_quality']
-            scores.append(calib_quality * self.weights['video']['calibration_quality'])
+            scores.append(calib_quality * self.w_video_calibration)
         
-        # Default if context missing
-        if not scores:
-            return video_note.get('confidence', 0.6)
+        return scores
+    
+    def _confidence_arrays(self, notes: Union[List[Dict], np.ndarray]) -> tuple:
+        """Return (has_confidence mask, confidence values) for a batch of notes"""
+        conf = pack_notes(notes)['confidence']
+        has_conf = ~np.isnan(conf)
+        return has_conf, np.where(has_conf, conf, 0.0)
+    
+    def _combine_batch_scores(self,
+                              has_conf: np.ndarray,
+                              weighted_conf: np.ndarray,
+                              context_scores: List[float],
+                              default: float) -> np.ndarray:
+        """Sum per-note and shared context terms in the same order as the scalar path"""
+        total = np.where(has_conf, weighted_conf, 0.0)
+        for score in context_scores:
+            total = total + score
         
-        return sum(scores)
+        # Notes with neither a confidence nor any context fall back to the default
+        if not context_scores:
+            total[~has_conf] = default
+        
+        return total
     
-    def compare_predictions(self, audio_note: Dict, video_note: Dict) -> Dict:
+    def compare_predictions(self, audio_note: Dict, video_note: Dict) -> Comparison:
         """
         Compare audio and video predictions for the same time window
         
         Returns:
-            Dictionary with comparison results
+            Comparison namedtuple with the comparison results
         """
         # Check if notes match
         string_match = audio_note.get('string') == video_note.get('string')
@@ -136,33 +258,89 @@ class ConfidenceScorer:
         elif freq_diff_cents < 100:  # Within 1 semitone
             agreement = 0.7
         
-        return {
-            'string_match': string_match,
-            'fret_match': fret_match,
-            'frequency_diff_cents': freq_diff_cents,
-            'agreement': agreement,
-            'audio_freq': audio_freq,
-            'video_freq': video_freq
-        }
+        return Comparison(string_match, fret_match, freq_diff_cents, agreement, audio_freq, video_freq)
     
-    def _calculate_frequency_from_position(self, string: int, fret: int) -> float:
-        """Calculate expected frequency for a string/fret position"""
-        from config.guitar_config import STANDARD_TUNING
+    def compare_predictions_batch(self,
+                                  audio_notes: Union[List[Dict], np.ndarray],
+                                  video_notes: Union[List[Dict], np.ndarray]) -> Comparison:
+        """
+        Compare every audio note against every video note at once
         
-        if string >= len(STANDARD_TUNING):
-            return 0
+        Vectorized equivalent of calling compare_predictions for each
+        (audio, video) combination.
         
-        note, octave = STANDARD_TUNING[string]
+        Args:
+            audio_notes: Note dictionaries or a packed note array
+            video_notes: Note dictionaries or a packed note array
         
-        # Note to frequency conversion
-        note_offsets = {
-            'C': -9, 'C#': -8, 'D': -7, 'D#': -6,
-            'E': -5, 'F': -4, 'F#': -3, 'G': -2,
-            'G#': -1, 'A': 0, 'A#': 1, 'B': 2
-        }
+        Returns:
+            Comparison with the same fields as compare_predictions, each an
+            array of shape (len(audio_notes), len(video_notes))
+        """
+        audio = pack_notes(audio_notes)
+        video = pack_notes(video_notes)
+        
+        return self._compare_packed(audio[:, None], video[None, :])
+    
+    def compare_pairs(self,
+                      audio_notes: Union[List[Dict], np.ndarray],
+                      video_notes: Union[List[Dict], np.ndarray]) -> Comparison:
+        """
+        Compare audio_notes[i] with video_notes[i] for every i
+        
+        Args:
+            audio_notes: Note dictionaries or a packed note array
+            video_notes: Same number of notes, paired element-wise
+        
+        Returns:
+            Comparison with the same fields as compare_predictions, each an
+            array of shape (len(audio_notes),)
+        """
+        return self._compare_packed(pack_notes(audio_notes), pack_notes(video_notes))
+    
+    def _compare_packed(self, audio: np.ndarray, video: np.ndarray) -> Comparison:
+        """Vectorized compare_predictions over broadcastable packed note arrays"""
+        # Packed notes store a missing string/fret as -1, so two missing values
+        # still compare equal just like None == None does per pair
+        a_string = audio['string'].astype(np.int64)
+        a_fret = audio['fret'].astype(np.int64)
+        v_string = video['string'].astype(np.int64)
+        v_fret = video['fret'].astype(np.int64)
+        
+        # compare_predictions looks a missing video position up as string 0, fret 0
+        video_freq = self._frequencies_from_positions(np.maximum(v_string, 0), np.maximum(v_fret, 0))
         
-        # A4 = 440 Hz
-        a4_freq = 440.0
-        semitones_from_a4 = note_offsets[note] + (octave - 4) * 12 + fret
+        string_match = a_string == v_string
+        fret_match = a_fret == v_fret
+        audio_freq, video_freq = np.broadcast_arrays(audio['frequency'], video_freq)
+        
+        # Frequency difference in cents (999 where no comparison is possible)
+        comparable = (audio_freq > 0) & (video_freq > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            freq_diff_cents = np.abs(1200 * np.log2(audio_freq / video_freq))
+        freq_diff_cents = np.where(comparable, freq_diff_cents, 999.0)
+        
+        # Agreement score, same precedence as compare_predictions
+        agreement = np.select(
+            [string_match & fret_match, string_match, freq_diff_cents < 100],
+            [1.0, 0.5, 0.7],
+            default=0.0
+        )
+        
+        return Comparison(string_match, fret_match, freq_diff_cents, agreement, audio_freq, video_freq)
+    
+    def _frequencies_from_positions(self, strings: np.ndarray, frets: np.ndarray) -> np.ndarray:
+        """Vectorized _calculate_frequency_from_position (0 Hz for invalid positions)"""
+        valid = (strings >= 0) & (strings < NUM_STRINGS) & (frets >= 0) & (frets <= NUM_FRETS)
+        
+        freqs = np.zeros(strings.shape)
+        freqs[valid] = self.fret_freqs[strings[valid], frets[valid]]
+        
+        return freqs
+    
+    def _calculate_frequency_from_position(self, string: int, fret: int) -> float:
+        """Calculate expected frequency for a string/fret position"""
+        if 0 <= string < NUM_STRINGS and 0 <= fret <= NUM_FRETS:
+            return float(self.fret_freqs[string, fret])
         
-        return a4_freq * (2 ** (semitones_from_a4 / 12))
\ No newline at end of file
+        return 0
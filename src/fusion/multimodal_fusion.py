@@ -1,9 +1,21 @@
 """
 Multimodal fusion - combine audio and video predictions - Phase 3.2 & 3.3
 """
+from collections import Counter
+from operator import itemgetter
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Tuple
+from scipy.optimize import linear_sum_assignment
 from src.fusion.confidence_scorer import ConfidenceScorer
+from src.fusion.note_array import pack_notes
+
+# How a matched audio/video pair is fused, in order of precedence
+(_PAIR_MERGE,
+ _PAIR_OCTAVE,
+ _PAIR_POSITION,
+ _PAIR_VIDEO_PRIORITY,
+ _PAIR_AUDIO_PRIORITY,
+ _PAIR_WEIGHTED) = range(6)
 
 
 class MultimodalFusion:
@@ -24,6 +36,19 @@ class MultimodalFusion:
         # Timing tolerance for matching audio/video events (seconds)
         self.time_tolerance = 0.15
     
+    @property
+    def video_weight(self) -> float:
+        """Weight for video predictions (0-1)"""
+        return self._video_weight
+    
+    @video_weight.setter
+    def video_weight(self, value: float):
+        self._video_weight = value
+        
+        # Constants derived from the weight are folded once per assignment
+        # instead of being recomputed for every note
+        self._octave_weight = value * 1.2  # Boost for catching an octave error
+    
     def fuse_predictions(self,
                         audio_notes: List[Dict],
                         video_notes: List[Dict],
@@ -44,179 +69,305 @@ class MultimodalFusion:
         audio_context = audio_context or {}
         video_context = video_context or {}
         
+        # Locals for the per-note loops below
+        audio_weight = self.audio_weight
+        video_weight = self.video_weight
+        
+        # Pack the numeric core of every note once; the dictionaries are only
+        # consulted for per-note metadata, addressed by row index
+        audio_arr = pack_notes(audio_notes, default_source='audio')
+        video_arr = pack_notes(video_notes, default_source='video')
+        
+        # Every note gets a 'time' once here (from the packed times), so
+        # nothing downstream needs the time/timestamp fallback chain
+        audio_notes = self._with_time(audio_notes, audio_arr)
+        video_notes = self._with_time(video_notes, video_arr)
+        
+        # Score every note once up front
+        audio_scores = self.confidence_scorer.score_audio_batch(audio_arr, audio_context)
+        video_scores = self.confidence_scorer.score_video_batch(video_arr, video_context)
+        
         # Match audio and video notes by time
-        matched_pairs, unmatched_audio, unmatched_video = self._match_notes_by_time(
-            audio_notes, video_notes
+        matched_audio, matched_video, unmatched_audio, unmatched_video = self._match_notes_by_time(
+            audio_arr, video_arr
+        )
+        pair_audio_conf = audio_scores[matched_audio]
+        pair_video_conf = video_scores[matched_video]
+        
+        # Decide how every matched pair is fused in one vectorized pass
+        cases, agreement = self._classify_pairs(
+            audio_arr[matched_audio], video_arr[matched_video],
+            pair_audio_conf, pair_video_conf
         )
         
+        # Confidence of a merged pair: weighted confidence scaled by agreement
+        merged_conf = (audio_weight * pair_audio_conf + video_weight * pair_video_conf) * agreement
+        
+        # Plain floats for cheap per-note indexing below
+        audio_scores = audio_scores.tolist()
+        video_scores = video_scores.tolist()
+        
         fused_notes = []
         
-        # Process matched pairs
-        for audio_note, video_note in matched_pairs:
-            fused_note = self._fuse_note_pair(
-                audio_note, video_note,
-                audio_context, video_context
-            )
-            if fused_note:
-                fused_notes.append(fused_note)
+        # Process matched pairs, dispatching on the precomputed case
+        resolvers = (
+            None,  # _PAIR_MERGE also needs the agreement and merged confidence
+            self._resolve_octave_error,
+            self._resolve_position_conflict,
+            self._prefer_video,
+            self._prefer_audio,
+            self._weighted_fusion
+        )
+        for a, v, case, pair_agreement, pair_conf in zip(matched_audio.tolist(), matched_video.tolist(),
+                                                         cases.tolist(), agreement.tolist(),
+                                                         merged_conf.tolist()):
+            if case == _PAIR_MERGE:
+                fused_note = self._merge_agreeing_notes(
+                    audio_notes[a], video_notes[v],
+                    audio_scores[a], video_scores[v], pair_agreement, pair_conf
+                )
+            else:
+                fused_note = resolvers[case](
+                    audio_notes[a], video_notes[v],
+                    audio_scores[a], video_scores[v]
+                )
+            fused_notes.append(fused_note)
         
         # Process unmatched audio notes (no video confirmation)
-        for audio_note in unmatched_audio:
-            audio_conf = self.confidence_scorer.score_audio_prediction(
-                audio_note, audio_context
-            )
+        for a in unmatched_audio.tolist():
+            audio_note = audio_notes[a]
+            audio_conf = audio_scores[a]
             
             # Only include if confidence is high enough
             if audio_conf > 0.5:
-                note = audio_note.copy()
-                note['source'] = 'audio_only'
-                note['confidence'] = audio_conf * self.audio_weight
-                fused_notes.append(note)
+                fused_notes.append({
+                    **audio_note,
+                    'source': 'audio_only',
+                    'confidence': audio_conf * audio_weight
+                })
         
         # Process unmatched video notes (no audio confirmation)
-        for video_note in unmatched_video:
-            video_conf = self.confidence_scorer.score_video_prediction(
-                video_note, video_context
-            )
+        for v in unmatched_video.tolist():
+            video_note = video_notes[v]
+            video_conf = video_scores[v]
             
             # Only include if confidence is high enough AND picking was detected
             if video_conf > 0.4 and video_note.get('played', False):
-                note = video_note.copy()
-                note['source'] = 'video_only'
-                note['confidence'] = video_conf * self.video_weight
-                fused_notes.append(note)
-        
-        # Sort by time
-        fused_notes.sort(key=lambda n: n.get('time', 0))
+                fused_notes.append({
+                    **video_note,
+                    'source': 'video_only',
+                    'confidence': video_conf * video_weight
+                })
+        
+        # Sort by time (stable argsort on a key array; keys pulled out by the
+        # C-level itemgetter, which is safe since every note has 'time')
+        times = np.fromiter(map(itemgetter('time'), fused_notes), dtype=np.float64, count=len(fused_notes))
+        order = np.argsort(times, kind='stable')
+        
+        return [fused_notes[i] for i in order]
+    
+    def _with_time(self, notes: List[Dict], packed: np.ndarray) -> List[Dict]:
+        """
+        Notes with a 'time' key for every one
         
-        return fused_notes
+        Notes that lack it are replaced by a copy carrying their packed time
+        ('timestamp', else 0); the caller's dictionaries are never modified.
+        """
+        return [
+            note if 'time' in note else {**note, 'time': time}
+            for note, time in zip(notes, packed['time'].tolist())
+        ]
     
     def _match_notes_by_time(self,
-                            audio_notes: List[Dict],
-                            video_notes: List[Dict]) -> Tuple[List, List, List]:
+                            audio_arr: np.ndarray,
+                            video_arr: np.ndarray) -> Tuple[np.ndarray, ...]:
         """
         Match audio and video notes that occur at similar times
         
+        Args:
+            audio_arr: Packed audio notes (see pack_notes)
+            video_arr: Packed video notes
+        
         Returns:
-            Tuple of (matched_pairs, unmatched_audio, unmatched_video)
+            Tuple of row-index arrays (matched_audio, matched_video,
+            unmatched_audio, unmatched_video); matched rows are paired
+            element-wise in video order
         """
-        matched_pairs = []
-        used_audio = set()
-        used_video = set()
+        audio_idx, video_idx = self._assign_by_time(audio_arr['time'], video_arr['time'])
+        
+        # Keep pairs in video order
+        pair_order = np.argsort(video_idx, kind='stable')
+        audio_idx = audio_idx[pair_order]
+        video_idx = video_idx[pair_order]
+        
+        # Collect unmatched notes (boolean masks: no sorting as in setdiff1d)
+        used_audio = np.zeros(len(audio_arr), dtype=bool)
+        used_video = np.zeros(len(video_arr), dtype=bool)
+        used_audio[audio_idx] = True
+        used_video[video_idx] = True
         
-        # Try to match each video note with audio notes
-        for v_idx, video_note in enumerate(video_notes):
-            video_time = video_note.get('time', video_note.get('timestamp', 0))
+        unmatched_audio = np.flatnonzero(~used_audio)
+        unmatched_video = np.flatnonzero(~used_video)
+        
+        return audio_idx, video_idx, unmatched_audio, unmatched_video
+    
+    def _assign_by_time(self,
+                        audio_times: np.ndarray,
+                        video_times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Optimal one-to-one pairing of audio and video events by time
+        
+        Unlike a greedy per-video-note search, the result does not depend on
+        note order: the assignment maximizes the number of pairs within
+        time_tolerance, then minimizes their total time offset. Events are
+        first split wherever consecutive times are at least time_tolerance
+        apart (no pair can span such a gap), so each Hungarian solve only
+        sees a small local cost matrix.
+        
+        Returns:
+            Tuple of (audio indices, video indices) of matched pairs
+        """
+        n_audio = len(audio_times)
+        times = np.concatenate([audio_times, video_times])
+        order = np.argsort(times, kind='stable')
+        breaks = np.flatnonzero(np.diff(times[order]) >= self.time_tolerance) + 1
+        
+        audio_idx = []
+        video_idx = []
+        
+        for group in np.split(order, breaks):
+            group_audio = group[group < n_audio]
+            group_video = group[group >= n_audio] - n_audio
+            
+            if len(group_audio) == 0 or len(group_video) == 0:
+                continue
             
-            best_audio_idx = None
-            min_time_diff = float('inf')
+            cost = np.abs(audio_times[group_audio][:, None] - video_times[group_video][None, :])
+            feasible = cost < self.time_tolerance
             
-            # Find closest audio note in time
-            for a_idx, audio_note in enumerate(audio_notes):
-                if a_idx in used_audio:
-                    continue
-                
-                audio_time = audio_note.get('time', 0)
-                time_diff = abs(audio_time - video_time)
-                
-                if time_diff < self.time_tolerance and time_diff < min_time_diff:
-                    min_time_diff = time_diff
-                    best_audio_idx = a_idx
+            # Out-of-tolerance pairs cost more than any set of real matches can
+            # add up to, so the solver first maximizes the number of matches
+            cost[~feasible] = self.time_tolerance * (min(cost.shape) + 1)
             
-            # If match found, pair them
-            if best_audio_idx is not None:
-                matched_pairs.append((audio_notes[best_audio_idx], video_note))
-                used_audio.add(best_audio_idx)
-                used_video.add(v_idx)
+            rows, cols = linear_sum_assignment(cost)
+            keep = feasible[rows, cols]
+            
+            audio_idx.append(group_audio[rows[keep]])
+            video_idx.append(group_video[cols[keep]])
         
-        # Collect unmatched notes
-        unmatched_audio = [n for i, n in enumerate(audio_notes) if i not in used_audio]
-        unmatched_video = [n for i, n in enumerate(video_notes) if i not in used_video]
+        if not audio_idx:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
         
-        return matched_pairs, unmatched_audio, unmatched_video
+        return np.concatenate(audio_idx), np.concatenate(video_idx)
     
-    def _fuse_note_pair(self,
-                       audio_note: Dict,
-                       video_note: Dict,
-                       audio_context: Dict,
-                       video_context: Dict) -> Optional[Dict]:
+    def _classify_pairs(self,
+                        audio_arr: np.ndarray,
+                        video_arr: np.ndarray,
+                        audio_conf: np.ndarray,
+                        video_conf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Fuse a matched audio-video note pair
+        Decide how each matched audio-video pair should be fused
+        
+        Args:
+            audio_arr: Packed audio notes of the pairs
+            video_arr: Packed video notes, paired element-wise with audio_arr
+            audio_conf: Scores of the audio notes
+            video_conf: Scores of the video notes
         
         Returns:
-            Fused note or None if conflict cannot be resolved
+            Tuple of (case codes (_PAIR_*), agreement scores), one per pair
         """
-        # Score both predictions
-        audio_conf = self.confidence_scorer.score_audio_prediction(audio_note, audio_context)
-        video_conf = self.confidence_scorer.score_video_prediction(video_note, video_context)
-        
-        # Compare predictions
-        comparison = self.confidence_scorer.compare_predictions(audio_note, video_note)
-        
-        # Case 1: Perfect agreement
-        if comparison['string_match'] and comparison['fret_match']:
-            return self._merge_agreeing_notes(
-                audio_note, video_note, audio_conf, video_conf
-            )
-        
-        # Case 2: Octave error (common in pitch detection)
-        if comparison['frequency_diff_cents'] > 1100 and comparison['frequency_diff_cents'] < 1300:
-            # Likely octave error - trust video more
-            return self._resolve_octave_error(
-                audio_note, video_note, audio_conf, video_conf
-            )
-        
-        # Case 3: Close frequency but different position (alternate fingering)
-        if comparison['frequency_diff_cents'] < 50:
-            # Same note, different position - trust video for position
-            return self._resolve_position_conflict(
-                audio_note, video_note, audio_conf, video_conf
-            )
-        
-        # Case 4: Significant disagreement
-        if comparison['agreement'] < 0.5:
-            # Use confidence-weighted voting
-            if video_conf > audio_conf * 1.5:  # Video much more confident
-                note = video_note.copy()
-                note['confidence'] = video_conf * self.video_weight
-                note['source'] = 'video_priority'
-                return note
-            elif audio_conf > video_conf * 1.5:  # Audio much more confident
-                note = audio_note.copy()
-                note['confidence'] = audio_conf * self.audio_weight
-                note['source'] = 'audio_priority'
-                # But use video position if available
-                if 'string' in video_note and 'fret' in video_note:
-                    note['string_video'] = video_note['string']
-                    note['fret_video'] = video_note['fret']
-                return note
-            else:
-                # Confidences similar but predictions differ - use weighted average
-                return self._weighted_fusion(
-                    audio_note, video_note, audio_conf, video_conf
-                )
-        
-        # Default: merge with agreement weighting
-        return self._merge_agreeing_notes(
-            audio_note, video_note, audio_conf, video_conf, comparison['agreement']
+        # Case 1: Perfect agreement. Checked on the packed positions first so
+        # only the remaining pairs pay for the frequency comparison
+        agree = (audio_arr['string'] == video_arr['string']) & (audio_arr['fret'] == video_arr['fret'])
+        
+        cases = np.full(len(agree), _PAIR_MERGE, dtype=np.int64)
+        agreement = np.ones(len(agree))
+        
+        rest = np.flatnonzero(~agree)
+        if len(rest) == 0:
+            return cases, agreement
+        
+        comparison = self.confidence_scorer.compare_pairs(audio_arr[rest], video_arr[rest])
+        cents = comparison.frequency_diff_cents
+        disagree = comparison.agreement < 0.5
+        audio_conf = audio_conf[rest]
+        video_conf = video_conf[rest]
+        
+        cases[rest] = np.select(
+            [
+                # Case 2: Octave error (common in pitch detection) - trust video more
+                (cents > 1100) & (cents < 1300),
+                # Case 3: Close frequency but different position (alternate fingering)
+                cents < 50,
+                # Case 4: Significant disagreement - confidence-weighted voting
+                disagree & (video_conf > audio_conf * 1.5),  # Video much more confident
+                disagree & (audio_conf > video_conf * 1.5),  # Audio much more confident
+                disagree  # Confidences similar but predictions differ
+            ],
+            [_PAIR_OCTAVE, _PAIR_POSITION,
+             _PAIR_VIDEO_PRIORITY, _PAIR_AUDIO_PRIORITY, _PAIR_WEIGHTED],
+            # Default: merge with agreement weighting
+            default=_PAIR_MERGE
         )
+        agreement[rest] = comparison.agreement
+        
+        return cases, agreement
+    
+    def _prefer_video(self,
+                      audio_note: Dict,
+                      video_note: Dict,
+                      audio_conf: float,
+                      video_conf: float) -> Dict:
+        """Take the video prediction when it is much more confident"""
+        return {
+            **video_note,
+            'confidence': video_conf * self.video_weight,
+            'source': 'video_priority'
+        }
+    
+    def _prefer_audio(self,
+                      audio_note: Dict,
+                      video_note: Dict,
+                      audio_conf: float,
+                      video_conf: float) -> Dict:
+        """Take the audio prediction when it is much more confident"""
+        note = {
+            **audio_note,
+            'confidence': audio_conf * self.audio_weight,
+            'source': 'audio_priority'
+        }
+        # But use video position if available
+        if 'string' in video_note and 'fret' in video_note:
+            note['string_video'] = video_note['string']
+            note['fret_video'] = video_note['fret']
+        return note
     
     def _merge_agreeing_notes(self,
                              audio_note: Dict,
                              video_note: Dict,
                              audio_conf: float,
                              video_conf: float,
-                             agreement: float = 1.0) -> Dict:
-        """Merge notes that agree (or mostly agree)"""
-        # Weighted confidence
-        total_weight = self.audio_weight * audio_conf + self.video_weight * video_conf
+                             agreement: float,
+                             confidence: float) -> Dict:
+        """
+        Merge notes that agree (or mostly agree)
         
+        Args:
+            audio_note: Audio note of the pair
+            video_note: Video note of the pair
+            audio_conf: Score of the audio note
+            video_conf: Score of the video note
+            agreement: Agreement score from the pair comparison
+            confidence: Fused confidence, computed for all pairs at once in
+                        fuse_predictions as (weighted confidence) * agreement
+        """
         fused_note = {
-            'time': video_note.get('time', video_note.get('timestamp', audio_note.get('time', 0))),
+            'time': video_note['time'],
             'string': video_note.get('string', audio_note.get('string')),
             'fret': video_note.get('fret', audio_note.get('fret')),
             'frequency': audio_note.get('frequency'),
-            'confidence': total_weight * agreement,
+            'confidence': confidence,
             'source': 'fused',
             'audio_confidence': audio_conf,
             'video_confidence': video_conf,
@@ -241,12 +392,14 @@ class MultimodalFusion:
                              audio_conf: float,
                              video_conf: float) -> Dict:
         """Resolve octave error by trusting video position"""
-        note = video_note.copy()
-        note['time'] = audio_note.get('time', video_note.get('time', video_note.get('timestamp', 0)))
-        note['confidence'] = (video_conf * self.video_weight * 1.2)  # Boost for catching error
-        note['source'] = 'octave_corrected'
-        note['audio_frequency_raw'] = audio_note.get('frequency')
-        note['correction'] = 'octave_error_fixed'
+        note = {
+            **video_note,
+            'time': audio_note['time'],
+            'confidence': video_conf * self._octave_weight,  # Boost for catching error
+            'source': 'octave_corrected',
+            'audio_frequency_raw': audio_note.get('frequency'),
+            'correction': 'octave_error_fixed'
+        }
         
         if 'duration' in audio_note:
             note['duration'] = audio_note['duration']
@@ -260,12 +413,14 @@ class MultimodalFusion:
                                   video_conf: float) -> Dict:
         """Resolve position conflict (same note, different fingering)"""
         # Same pitch, trust video for exact position
-        note = video_note.copy()
-        note['time'] = audio_note.get('time', video_note.get('time', video_note.get('timestamp', 0)))
-        note['frequency'] = audio_note.get('frequency')  # Use measured frequency
-        note['confidence'] = (audio_conf * self.audio_weight + video_conf * self.video_weight)
-        note['source'] = 'position_corrected'
-        note['alternate_fingering'] = True
+        note = {
+            **video_note,
+            'time': audio_note['time'],
+            'frequency': audio_note.get('frequency'),  # Use measured frequency
+            'confidence': (audio_conf * self.audio_weight + video_conf * self.video_weight),
+            'source': 'position_corrected',
+            'alternate_fingering': True
+        }
         
         if 'duration' in audio_note:
             note['duration'] = audio_note['duration']
@@ -278,22 +433,25 @@ class MultimodalFusion:
                         audio_conf: float,
                         video_conf: float) -> Dict:
         """Fuse conflicting predictions using weighted voting"""
-        # Normalize weights
-        total_conf = audio_conf * self.audio_weight + video_conf * self.video_weight
-        audio_norm = (audio_conf * self.audio_weight) / total_conf
-        video_norm = (video_conf * self.video_weight) / total_conf
+        # Normalize weights (each weighted term computed once)
+        weighted_audio = audio_conf * self.audio_weight
+        weighted_video = video_conf * self.video_weight
+        total_conf = weighted_audio + weighted_video
+        audio_norm = weighted_audio / total_conf
+        video_norm = weighted_video / total_conf
         
         # Decide which prediction to use based on normalized confidence
         if video_norm > 0.6:  # Video has strong majority
-            note = video_note.copy()
-            note['source'] = 'video_weighted'
+            note = {**video_note, 'source': 'video_weighted'}
         else:  # Audio wins or close call
-            note = audio_note.copy()
-            note['source'] = 'audio_weighted'
-            # But add video position as alternative
-            note['video_position'] = {
-                'string': video_note.get('string'),
-                'fret': video_note.get('fret')
+            note = {
+                **audio_note,
+                'source': 'audio_weighted',
+                # But add video position as alternative
+                'video_position': {
+                    'string': video_note.get('string'),
+                    'fret': video_note.get('fret')
+                }
             }
         
         note['confidence'] = total_conf * 0.8  # Penalty for disagreement
@@ -308,19 +466,26 @@ class MultimodalFusion:
         if not fused_notes:
             return {}
         
-        sources = {}
-        for note in fused_notes:
-            source = note.get('source', 'unknown')
-            sources[source] = sources.get(source, 0) + 1
+        # Single pass over the notes, updating every statistic at once
+        sources = Counter()
+        confidences = np.empty(len(fused_notes))
+        corrections = 0
+        conflicts = 0
         
-        avg_confidence = np.mean([n.get('confidence', 0) for n in fused_notes])
+        for i, note in enumerate(fused_notes):
+            sources[note.get('source', 'unknown')] += 1
+            confidences[i] = note.get('confidence', 0)
+            
+            if 'correction' in note:
+                corrections += 1
+            if note.get('conflict_resolved', False):
+                conflicts += 1
         
-        corrections = sum(1 for n in fused_notes if 'correction' in n)
-        conflicts = sum(1 for n in fused_notes if n.get('conflict_resolved', False))
+        avg_confidence = confidences.mean()
         
         return {
             'total_notes': len(fused_notes),
-            'source_distribution': sources,
+            'source_distribution': dict(sources),
             'average_confidence': avg_confidence,
             'corrections_made': corrections,
             'conflicts_resolved': conflicts
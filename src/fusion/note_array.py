@@ -0,0 +1,58 @@
+"""
+Packed NumPy note arrays for vectorized fusion - Phase 3
+"""
+import numpy as np
+from typing import Dict, List, Union
+from config.guitar_config import NOTE_DTYPE, NOTE_SOURCES
+
+NOTE_DTYPE = np.dtype(NOTE_DTYPE)
+
+_SOURCE_CODES = {name: code for code, name in enumerate(NOTE_SOURCES)}
+
+
+def pack_notes(notes: Union[List[Dict], np.ndarray], default_source: str = 'unknown') -> np.ndarray:
+    """
+    Pack note dictionaries into a NOTE_DTYPE structured array
+    
+    Only the numeric core of each note is packed; optional metadata
+    (finger, strumming, corrections, ...) stays on the dictionaries.
+    
+    Args:
+        notes: List of note dictionaries (an already packed array is returned as-is)
+        default_source: Source label for notes without a 'source' key
+        
+    Returns:
+        Structured array with one row per note
+    """
+    if isinstance(notes, np.ndarray):
+        return notes
+    
+    default_code = _SOURCE_CODES.get(default_source, 0)
+    
+    return np.fromiter(
+        (_note_record(note, default_code) for note in notes),
+        dtype=NOTE_DTYPE,
+        count=len(notes)
+    )
+
+
+def source_label(code: int) -> str:
+    """Convert a packed source code back to its label"""
+    return NOTE_SOURCES[code]
+
+
+def _note_record(note: Dict, default_code: int) -> tuple:
+    """Build one NOTE_DTYPE row from a note dictionary"""
+    string = note.get('string')
+    fret = note.get('fret')
+    frequency = note.get('frequency')
+    confidence = note.get('confidence')
+    
+    return (
+        note.get('time', note.get('timestamp', 0)),
+        -1 if string is None else string,
+        -1 if fret is None else fret,
+        0.0 if frequency is None else frequency,
+        np.nan if confidence is None else confidence,
+        _SOURCE_CODES.get(note.get('source'), default_code),
+    )
@@ -1,21 +1,116 @@
 """
 Advanced position selection for playability - Phase 3.4
 """
+from functools import partial
 from typing import List, Dict, Optional
 import numpy as np
 
 
+def _playability_score(string1: int, fret1: int, string2: int, fret2: int,
+                       max_fret_stretch: int, max_string_jump: int) -> float:
+    """
+    Score playability of transitioning from one position to another
+    
+    Higher score = more playable
+    """
+    score = 100.0
+    
+    # Penalize large fret jumps
+    fret_jump = abs(fret1 - fret2)
+    if fret_jump > max_fret_stretch:
+        score -= (fret_jump - max_fret_stretch) * 10
+    
+    # Penalize large string jumps
+    string_jump = abs(string1 - string2)
+    if string_jump > max_string_jump:
+        score -= (string_jump - max_string_jump) * 5
+    
+    # Prefer staying in same position area
+    if fret_jump <= 2 and string_jump <= 1:
+        score += 20
+    
+    return max(0, score)
+
+
+def _playability_scores(strings1: np.ndarray, frets1: np.ndarray,
+                        strings2: np.ndarray, frets2: np.ndarray,
+                        max_fret_stretch: int, max_string_jump: int) -> np.ndarray:
+    """Vectorized _playability_score over broadcastable position arrays"""
+    fret_jump = np.abs(np.asarray(frets1) - np.asarray(frets2))
+    string_jump = np.abs(np.asarray(strings1) - np.asarray(strings2))
+    
+    score = (100.0
+             - np.maximum(fret_jump - max_fret_stretch, 0) * 10
+             - np.maximum(string_jump - max_string_jump, 0) * 5)
+    score = score + np.where((fret_jump <= 2) & (string_jump <= 1), 20, 0)
+    
+    return np.maximum(score, 0)
+
+
+def _chord_breaks(times: np.ndarray, window: float) -> np.ndarray:
+    """
+    Start index of every chord group in a sorted times array
+    
+    A group holds every note less than window after its first note. Its
+    end is found by galloping (doubling a bound until a note falls outside
+    the window) and then a binary search inside that bound, so each group
+    costs time proportional to its own size rather than the notes after it.
+    Both steps compare differences from the first note, exactly the
+    note_time - current_time < window test (times[start] + window can round
+    differently, e.g. 0.04 + 0.05 == 0.09 while 0.09 - 0.04 < 0.05).
+    """
+    breaks = []
+    start = 0
+    n = len(times)
+    
+    while start < n:
+        breaks.append(start)
+        first = times[start]
+        
+        # times[start + bound] is outside the group (or past the end)
+        bound = 1
+        while start + bound < n and times[start + bound] - first < window:
+            bound *= 2
+        
+        stop = min(start + bound + 1, n)
+        end = start + int(np.searchsorted(times[start:stop] - first, window, side='left'))
+        start = max(end, start + 1)
+    
+    return np.array(breaks, dtype=np.int64)
+
+
 class PositionOptimizer:
     """Optimize note positions for playability"""
     
-    def __init__(self):
-        self.max_fret_stretch = 4  # Maximum comfortable fret span
-        self.max_string_jump = 3   # Maximum comfortable string jump
+    __slots__ = ('max_fret_stretch', 'max_string_jump', '_score')
+    
+    def __init__(self, max_fret_stretch=4, max_string_jump=3):
+        """
+        Args:
+            max_fret_stretch: Maximum comfortable fret span
+            max_string_jump: Maximum comfortable string jump
+        """
+        self.max_fret_stretch = max_fret_stretch
+        self.max_string_jump = max_string_jump
+        
+        # Per-note scorer with the thresholds bound once, so the hot loop
+        # does no attribute lookups for them
+        self._score = partial(
+            _playability_score,
+            max_fret_stretch=max_fret_stretch,
+            max_string_jump=max_string_jump
+        )
     
     def optimize_positions(self, notes: List[Dict]) -> List[Dict]:
         """
         Optimize note positions for natural playability
         
+        Only notes carrying a video position can move, and each decision
+        depends on the previous note's final position. Those previous
+        positions are known up front unless the previous note moved itself,
+        so every decision is first scored in one vectorized pass and only
+        notes right after a moved note are re-scored individually.
+        
         Args:
             notes: List of fused notes
             
@@ -25,55 +120,73 @@ class PositionOptimizer:
         if not notes:
             return notes
         
-        optimized = []
-        last_position = None
+        # Position of the note before each note (None for the first one)
+        last_strings = [None] + [n.get('string') for n in notes[:-1]]
+        last_frets = [None] + [n.get('fret') for n in notes[:-1]]
+        
+        # Notes that may switch to their video position: those not kept as-is
+        # (high confidence with video confirmation). A missing previous
+        # position becomes NaN below and never switches
+        candidates = [
+            i for i, note in enumerate(notes)
+            if 'video_position' in note
+            and not (note.get('source') in ('fused', 'video_only') and note.get('confidence', 0) > 0.8)
+        ]
         
-        for note in notes:
-            # If note has high confidence and video confirmation, keep it
-            if note.get('source') in ['fused', 'video_only'] and note.get('confidence', 0) > 0.8:
-                optimized.append(note)
-                last_position = {'string': note.get('string'), 'fret': note.get('fret')}
-                continue
+        if not candidates:
+            return list(notes)
+        
+        prefers_video = self._prefers_video_batch(
+            [notes[i] for i in candidates],
+            np.array([last_strings[i] for i in candidates], dtype=np.float64),
+            np.array([last_frets[i] for i in candidates], dtype=np.float64)
+        )
+        
+        moved = set()
+        for i, use_video in zip(candidates, prefers_video.tolist()):
+            if i - 1 in moved:
+                # The previous note just moved: re-score against its new position
+                use_video = self._prefers_video_position(
+                    notes[i], notes[i - 1]['string'], notes[i - 1]['fret']
+                )
             
-            # Otherwise, optimize position
-            optimized_note = self._optimize_single_position(note, last_position)
-            optimized.append(optimized_note)
-            last_position = {'string': optimized_note.get('string'), 'fret': optimized_note.get('fret')}
+            if use_video:
+                video_pos = notes[i]['video_position']
+                notes[i]['string'] = video_pos['string']
+                notes[i]['fret'] = video_pos['fret']
+                notes[i]['position_optimized'] = True
+                moved.add(i)
         
-        return optimized
+        return list(notes)
     
-    def _optimize_single_position(self, note: Dict, last_position: Optional[Dict]) -> Dict:
-        """Optimize a single note's position"""
-        # If no alternative positions, return as-is
-        if 'video_position' not in note and 'alternate_fingering' not in note:
-            return note
+    def _prefers_video_position(self, note: Dict,
+                                last_string: Optional[int], last_fret: Optional[int]) -> bool:
+        """Whether a note's video position is clearly more playable than its current one"""
+        if last_string is None:
+            return False
         
-        current_string = note.get('string')
-        current_fret = note.get('fret')
+        video_pos = note['video_position']
         
-        # If we have video position as alternative, consider it
-        if 'video_position' in note:
-            video_pos = note['video_position']
-            
-            # Calculate playability score for both positions
-            if last_position:
-                current_score = self._playability_score(
-                    current_string, current_fret,
-                    last_position['string'], last_position['fret']
-                )
-                
-                video_score = self._playability_score(
-                    video_pos['string'], video_pos['fret'],
-                    last_position['string'], last_position['fret']
-                )
-                
-                # If video position is more playable, use it
-                if video_score > current_score * 1.2:  # 20% better
-                    note['string'] = video_pos['string']
-                    note['fret'] = video_pos['fret']
-                    note['position_optimized'] = True
+        # Calculate playability score for both positions
+        current_score = self._score(note.get('string'), note.get('fret'), last_string, last_fret)
+        video_score = self._score(video_pos['string'], video_pos['fret'], last_string, last_fret)
+        
+        # If video position is more playable, use it
+        return video_score > current_score * 1.2  # 20% better
+    
+    def _prefers_video_batch(self, notes: List[Dict],
+                             last_strings: np.ndarray, last_frets: np.ndarray) -> np.ndarray:
+        """Vectorized _prefers_video_position for notes with known previous positions"""
+        current_strings = np.array([n.get('string') for n in notes], dtype=np.float64)
+        current_frets = np.array([n.get('fret') for n in notes], dtype=np.float64)
+        video_strings = np.array([n['video_position']['string'] for n in notes], dtype=np.float64)
+        video_frets = np.array([n['video_position']['fret'] for n in notes], dtype=np.float64)
         
-        return note
+        current_scores = self.playability_scores(current_strings, current_frets, last_strings, last_frets)
+        video_scores = self.playability_scores(video_strings, video_frets, last_strings, last_frets)
+        
+        # A missing position (NaN) never compares greater, so it never switches
+        return video_scores > current_scores * 1.2  # 20% better
     
     def _playability_score(self, string1: int, fret1: int, string2: int, fret2: int) -> float:
         """
@@ -81,23 +194,24 @@ class PositionOptimizer:
         
         Higher score = more playable
         """
-        score = 100.0
-        
-        # Penalize large fret jumps
-        fret_jump = abs(fret1 - fret2)
-        if fret_jump > self.max_fret_stretch:
-            score -= (fret_jump - self.max_fret_stretch) * 10
-        
-        # Penalize large string jumps
-        string_jump = abs(string1 - string2)
-        if string_jump > self.max_string_jump:
-            score -= (string_jump - self.max_string_jump) * 5
-        
-        # Prefer staying in same position area
-        if fret_jump <= 2 and string_jump <= 1:
-            score += 20
+        return self._score(string1, fret1, string2, fret2)
+    
+    def playability_scores(self, strings: np.ndarray, frets: np.ndarray,
+                           last_string: int, last_fret: int) -> np.ndarray:
+        """
+        Score many candidate positions against the previous position at once
         
-        return max(0, score)
+        Args:
+            strings: Candidate string numbers
+            frets: Candidate fret numbers (same shape as strings)
+            last_string: String of the previous note (or an array of them)
+            last_fret: Fret of the previous note (or an array of them)
+            
+        Returns:
+            Array of playability scores, same values as _playability_score
+        """
+        return _playability_scores(strings, frets, last_string, last_fret,
+                                   self.max_fret_stretch, self.max_string_jump)
     
     def group_into_chords(self, notes: List[Dict], time_window: float = 0.05) -> List[Dict]:
         """
@@ -114,53 +228,35 @@ class PositionOptimizer:
             return []
         
         # Sort by time
-        sorted_notes = sorted(notes, key=lambda n: n.get('time', 0))
+        times = np.fromiter((n.get('time', 0) for n in notes), dtype=np.float64, count=len(notes))
+        order = np.argsort(times, kind='stable')
+        sorted_notes = [notes[i] for i in order]
+        times = times[order]
+        
+        # Group boundaries first, then one walk over them to build the events
+        starts = _chord_breaks(times, time_window)
+        ends = np.append(starts[1:], len(times))
         
         grouped_events = []
-        current_group = [sorted_notes[0]]
-        current_time = sorted_notes[0].get('time', 0)
         
-        for note in sorted_notes[1:]:
-            note_time = note.get('time', 0)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            current_group = sorted_notes[start:end]
+            current_time = current_group[0].get('time', 0)
             
-            # If within time window, add to current group
-            if abs(note_time - current_time) < time_window:
-                current_group.append(note)
+            if len(current_group) > 1:
+                # It's a chord
+                grouped_events.append({
+                    'type': 'chord',
+                    'notes': current_group,
+                    'time': current_time,
+                    'num_notes': len(current_group)
+                })
             else:
-                # Finalize current group
-                if len(current_group) > 1:
-                    # It's a chord
-                    grouped_events.append({
-                        'type': 'chord',
-                        'notes': current_group,
-                        'time': current_time,
-                        'num_notes': len(current_group)
-                    })
-                else:
-                    # Single note
-                    grouped_events.append({
-                        'type': 'note',
-                        'note': current_group[0],
-                        'time': current_time
-                    })
-                
-                # Start new group
-                current_group = [note]
-                current_time = note_time
-        
-        # Don't forget last group
-        if len(current_group) > 1:
-            grouped_events.append({
-                'type': 'chord',
-                'notes': current_group,
-                'time': current_time,
-                'num_notes': len(current_group)
-            })
-        elif current_group:
-            grouped_events.append({
-                'type': 'note',
-                'note': current_group[0],
-                'time': current_time
-            })
+                # Single note
+                grouped_events.append({
+                    'type': 'note',
+                    'note': current_group[0],
+                    'time': current_time
+                })
         
         return grouped_events
\ No newline at end of file
@@ -1,12 +1,23 @@
 """
 Complete transcription pipeline - Phase 3 (Multimodal Fusion)
 """
+import atexit
+import logging
+import os
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Optional
+import cv2
 import numpy as np
 
 # Phase 1: Audio
 from src.audio.extractor import AudioExtractor
-from src.audio.pitch_detector import PitchDetector
+from src.audio.pitch_detector import PitchDetector, PitchTrack
 from src.audio.onset_detector import OnsetDetector
 
 # Phase 2: Video
@@ -24,6 +35,35 @@ from src.fusion.position_optimizer import PositionOptimizer
 from src.transcription.guitar_mapper import GuitarMapper
 from src.transcription.tab_generator import TabGenerator
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _get_hand_tracker() -> HandTracker:
+    """
+    HandTracker shared by every pipeline in this process
+    
+    Building the MediaPipe graph takes about half a second, so repeated
+    process() calls reuse one tracker; it is closed at interpreter exit.
+    """
+    tracker = HandTracker()
+    atexit.register(tracker.close)
+    return tracker
+
+
+def _bbox_iou(a: tuple, b: tuple) -> float:
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    
+    inter = inter_w * inter_h
+    return inter / (aw * ah + bw * bh - inter)
+
 
 class TranscriptionPipeline:
     """
@@ -33,26 +73,28 @@ class TranscriptionPipeline:
     def __init__(self, 
                  mode='multimodal',  # 'audio', 'video', or 'multimodal'
                  audio_weight=0.4,
-                 video_weight=0.6):
+                 video_weight=0.6,
+                 pitch_quality='final'):  # 'draft' or 'final'
         """
         Args:
             mode: Processing mode
             audio_weight: Weight for audio in fusion
             video_weight: Weight for video in fusion
+            pitch_quality: CREPE decoding quality ('draft' skips Viterbi)
         """
         self.mode = mode
         
         # Phase 1: Audio components
         if mode in ['audio', 'multimodal']:
             self.audio_extractor = AudioExtractor()
-            self.pitch_detector = PitchDetector()
+            self.pitch_detector = PitchDetector(mode=pitch_quality)
             self.onset_detector = OnsetDetector()
             self.guitar_mapper = GuitarMapper()
         
         # Phase 2: Video components
         if mode in ['video', 'multimodal']:
             self.frame_extractor = FrameExtractor(target_fps=15)
-            self.hand_tracker = HandTracker()
+            self.hand_tracker = _get_hand_tracker()
             self.fretboard_detector = FretboardDetector(enable_calibration=True)
             self.finger_mapper = FingerMapper()
             self.string_detector = StringStateDetector()
@@ -65,6 +107,33 @@ class TranscriptionPipeline:
         # Tab generation
         self.tab_generator = TabGenerator()
     
+    @classmethod
+    def process_batch(cls, input_paths: list, output_debug: bool = False,
+                      max_workers: int = None, **pipeline_kwargs) -> list:
+        """
+        Process several files in parallel, one pipeline per worker process
+        
+        Files are independent, so each worker runs the full process() on its
+        own. Processes rather than threads: the detectors hold the GIL for
+        much of their per-frame Python work, and TensorFlow/MediaPipe state is
+        per process anyway.
+        
+        Args:
+            input_paths: Paths to input files
+            output_debug: Whether to save debug visualizations
+            max_workers: Worker processes (defaults to the CPU count)
+            **pipeline_kwargs: Arguments for each worker's TranscriptionPipeline
+            
+        Returns:
+            List of process() results, in the order of input_paths
+        """
+        # Spawned, not forked: TensorFlow and MediaPipe are not fork-safe
+        context = multiprocessing.get_context('spawn')
+        jobs = [(path, output_debug, pipeline_kwargs) for path in input_paths]
+        
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context) as executor:
+            return list(executor.map(_process_file, jobs))
+    
     def process(self, input_path: str, output_debug: bool = False) -> dict:
         """
         Process an audio/video file and return guitar tab with metadata
@@ -81,10 +150,10 @@ class TranscriptionPipeline:
         if not input_path.exists():
             raise FileNotFoundError(f"Input file not found: {input_path}")
         
-        print(f"\n{'='*70}")
-        print(f"PHASE 3: MULTIMODAL FUSION TRANSCRIPTION")
-        print(f"Mode: {self.mode.upper()}")
-        print(f"{'='*70}\n")
+        logger.info(f"\n{'='*70}")
+        logger.info(f"PHASE 3: MULTIMODAL FUSION TRANSCRIPTION")
+        logger.info(f"Mode: {self.mode.upper()}")
+        logger.info(f"{'='*70}\n")
         
         result = {
             'audio_notes': None,
@@ -96,58 +165,59 @@ class TranscriptionPipeline:
         
         # Phase 1: Audio Analysis
         if self.mode in ['audio', 'multimodal']:
-            print("=" * 70)
-            print("PHASE 1: AUDIO ANALYSIS")
-            print("=" * 70)
-            audio_notes = self._process_audio(input_path)
+            logger.info("=" * 70)
+            logger.info("PHASE 1: AUDIO ANALYSIS")
+            logger.info("=" * 70)
+            audio_notes, audio_context = self._process_audio(input_path)
             result['audio_notes'] = audio_notes
-            print(f"✓ Audio analysis complete: {len(audio_notes)} notes detected\n")
+            result['metadata']['audio_context'] = audio_context
+            logger.info(f"✓ Audio analysis complete: {len(audio_notes)} notes detected\n")
         
         # Phase 2: Video Analysis
         if self.mode in ['video', 'multimodal']:
-            print("=" * 70)
-            print("PHASE 2: VIDEO ANALYSIS")
-            print("=" * 70)
+            logger.info("=" * 70)
+            logger.info("PHASE 2: VIDEO ANALYSIS")
+            logger.info("=" * 70)
             video_notes, video_context = self._process_video(input_path, output_debug)
             result['video_notes'] = video_notes
             result['metadata']['video_context'] = video_context
-            print(f"✓ Video analysis complete: {len(video_notes)} note events detected\n")
+            logger.info(f"✓ Video analysis complete: {len(video_notes)} note events detected\n")
         
         # Phase 3: Fusion
         if self.mode == 'multimodal':
-            print("=" * 70)
-            print("PHASE 3: MULTIMODAL FUSION")
-            print("=" * 70)
+            logger.info("=" * 70)
+            logger.info("PHASE 3: MULTIMODAL FUSION")
+            logger.info("=" * 70)
             
             fused_notes = self.fusion.fuse_predictions(
                 result['audio_notes'],
                 result['video_notes'],
-                audio_context={'onset_strength': 5.0},  # Could be calculated
+                audio_context=result['metadata'].get('audio_context', {}),
                 video_context=result['metadata'].get('video_context', {})
             )
             
-            print(f"Step 1: Fusion complete - {len(fused_notes)} notes after fusion")
+            logger.info(f"Step 1: Fusion complete - {len(fused_notes)} notes after fusion")
             
             # Optimize positions
             optimized_notes = self.position_optimizer.optimize_positions(fused_notes)
-            print(f"Step 2: Position optimization complete")
+            logger.info(f"Step 2: Position optimization complete")
             
             # Group into chords
             note_events = self.position_optimizer.group_into_chords(optimized_notes)
-            print(f"Step 3: Chord grouping complete - {len(note_events)} events")
+            logger.info(f"Step 3: Chord grouping complete - {len(note_events)} events")
             
             # Get fusion statistics
             fusion_stats = self.fusion.get_fusion_stats(fused_notes)
             result['metadata']['fusion_stats'] = fusion_stats
             
-            print(f"\nFusion Statistics:")
-            print(f"  Total notes: {fusion_stats.get('total_notes', 0)}")
-            print(f"  Average confidence: {fusion_stats.get('average_confidence', 0):.2f}")
-            print(f"  Corrections made: {fusion_stats.get('corrections_made', 0)}")
-            print(f"  Conflicts resolved: {fusion_stats.get('conflicts_resolved', 0)}")
-            print(f"\nSources breakdown:")
+            logger.info(f"\nFusion Statistics:")
+            logger.info(f"  Total notes: {fusion_stats.get('total_notes', 0)}")
+            logger.info(f"  Average confidence: {fusion_stats.get('average_confidence', 0):.2f}")
+            logger.info(f"  Corrections made: {fusion_stats.get('corrections_made', 0)}")
+            logger.info(f"  Conflicts resolved: {fusion_stats.get('conflicts_resolved', 0)}")
+            logger.info(f"\nSources breakdown:")
             for source, count in fusion_stats.get('sources', {}).items():
-                print(f"    {source}: {count}")
+                logger.info(f"    {source}: {count}")
             
             result['fused_notes'] = optimized_notes
             result['note_events'] = note_events
@@ -160,143 +230,452 @@ class TranscriptionPipeline:
             notes_for_tab = result['video_notes']
         
         # Generate final tab
-        print(f"\n{'='*70}")
-        print("GENERATING TAB")
-        print(f"{'='*70}")
+        logger.info(f"\n{'='*70}")
+        logger.info("GENERATING TAB")
+        logger.info(f"{'='*70}")
         
         tab = self.tab_generator.generate(notes_for_tab)
         result['tab'] = tab
         
-        print("✓ Tab generation complete\n")
+        logger.info("✓ Tab generation complete\n")
         
         return result
     
-    def _process_audio(self, input_path: Path) -> list:
-        """Process audio (Phase 1)"""
-        print("Step 1/5: Extracting audio...")
-        audio, sample_rate = self.audio_extractor.extract(input_path)
-        print(f"  → Audio loaded: {len(audio)/sample_rate:.2f}s @ {sample_rate} Hz")
+    def _process_audio(self, input_path: Path, chunk_seconds: float = 10.0, overlap: float = 0.25) -> tuple:
+        """
+        Process audio (Phase 1)
         
-        print("Step 2/5: Detecting pitches...")
-        pitches, confidences, times = self.pitch_detector.detect(audio, sample_rate)
-        print(f"  → Detected {len(pitches)} pitch frames")
+        Audio is decoded and analyzed in overlapping chunks, so memory stays
+        flat for long recordings and decoding the next chunk overlaps the
+        detection running on the current one. Each chunk keeps the pitch
+        frames and onset envelope frames up to the middle of its overlap with
+        the next; onsets are then peak-picked once over the whole envelope.
         
-        print("Step 3/5: Detecting note onsets...")
-        onset_times = self.onset_detector.detect(audio, sample_rate)
-        print(f"  → Found {len(onset_times)} note onsets")
+        Frames near a chunk's edges are computed from zero-padded analysis
+        windows, so the overlap is widened to at least twice the longest
+        detector's edge: every kept frame then sees only real audio.
         
-        print("Step 4/5: Mapping to guitar strings and frets...")
+        Args:
+            input_path: Path to input file
+            chunk_seconds: Length of each analyzed chunk
+            overlap: Overlap between consecutive chunks in seconds (at least)
+            
+        Returns:
+            Tuple of (notes, audio context for fusion)
+        """
+        logger.info("Step 1/5: Extracting audio...")
+        sample_rate = self.audio_extractor.target_sr
+        edge = max(self.onset_detector.edge_seconds(sample_rate), self.pitch_detector.edge_seconds())
+        overlap = max(overlap, 2 * edge)
+        chunks = self.audio_extractor.iter_chunks(input_path, window=chunk_seconds, overlap=overlap)
+        
+        # Pitch (CREPE) and onset (librosa) detection only read the extracted
+        # audio, so run them side by side instead of back to back
+        logger.info("Step 2/5: Detecting pitches...")
+        logger.info("Step 3/5: Detecting note onsets...")
+        pitch_parts = []
+        envelope_parts = []
+        envelope_time_parts = []
+        duration = 0.0
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pending = None
+            lower = -np.inf
+            
+            # Pulling the next chunk decodes it while the previous one is analyzed
+            for chunk, offset in chunks:
+                if pending:
+                    # The previous chunk keeps everything up to the middle of the overlap
+                    upper = offset + overlap / 2
+                    self._collect_audio_chunk(*pending, lower, upper, pitch_parts, envelope_parts, envelope_time_parts)
+                    lower = upper
+                
+                pending = (
+                    executor.submit(self.pitch_detector.detect, chunk, sample_rate),
+                    executor.submit(self.onset_detector.onset_strength, chunk, sample_rate),
+                    offset
+                )
+                duration = offset + len(chunk) / sample_rate
+            
+            if pending:
+                self._collect_audio_chunk(*pending, lower, np.inf, pitch_parts, envelope_parts, envelope_time_parts)
+        
+        logger.info(f"  → Audio loaded: {duration:.2f}s @ {sample_rate} Hz")
+        
+        pitch_track = PitchTrack(
+            np.concatenate([p.frequencies for p in pitch_parts]),
+            np.concatenate([p.confidences for p in pitch_parts]),
+            np.concatenate([p.times for p in pitch_parts])
+        )
+        
+        # Peak picking normalizes the envelope to its maximum and looks at the
+        # frames around each peak, so it runs once over the whole recording
+        onset_envelope = np.concatenate(envelope_parts)
+        envelope_times = np.concatenate(envelope_time_parts)
+        onset_times = envelope_times[self.onset_detector.pick_onsets(onset_envelope, sample_rate)]
+        
+        logger.info(f"  → Detected {len(pitch_track)} pitch frames")
+        logger.info(f"  → Found {len(onset_times)} note onsets")
+        
+        logger.info("Step 4/5: Mapping to guitar strings and frets...")
         notes = self.guitar_mapper.map_to_guitar(
-            pitches, confidences, times, onset_times
+            pitch_track.frequencies, pitch_track.confidences, pitch_track.times, onset_times
         )
-        print(f"  → Mapped {len(notes)} notes")
+        logger.info(f"  → Mapped {len(notes)} notes")
         
-        print("Step 5/5: Audio analysis complete")
+        # Onset clarity for fusion, from the envelope onset detection already computed
+        audio_context = {}
+        if len(onset_envelope) > 0:
+            audio_context['onset_strength'] = float(onset_envelope.mean())
         
-        return notes
+        logger.info("Step 5/5: Audio analysis complete")
+        
+        return notes, audio_context
     
-    def _process_video(self, input_path: Path, output_debug: bool) -> tuple:
-        """Process video (Phase 2)"""
-        print("Step 1/7: Extracting frames...")
-        frames = self.frame_extractor.extract_frames(input_path, max_frames=200)
-        print(f"  → Extracted {len(frames)} frames")
+    def _collect_audio_chunk(self, pitch_future, envelope_future, offset: float,
+                             lower: float, upper: float,
+                             pitch_parts: list, envelope_parts: list, envelope_time_parts: list):
+        """Shift one chunk's results to absolute time and keep those in [lower, upper)"""
+        track = pitch_future.result()
+        times = track.times + offset
+        keep = (times >= lower) & (times < upper)
+        pitch_parts.append(PitchTrack(track.frequencies[keep], track.confidences[keep], times[keep]))
+        
+        envelope = envelope_future.result()
+        
+        # Envelope frame i covers hop_length samples starting at i * hop_length
+        hop_seconds = self.onset_detector.hop_length / self.audio_extractor.target_sr
+        envelope_times = np.arange(len(envelope)) * hop_seconds + offset
+        keep = (envelope_times >= lower) & (envelope_times < upper)
+        envelope_parts.append(envelope[keep])
+        envelope_time_parts.append(envelope_times[keep])
+    
+    def _process_video(self, input_path: Path, output_debug: bool, prefetch: int = 8,
+                       skip_stride: int = 3, motion_threshold: float = 4.0) -> tuple:
+        """
+        Process video (Phase 2)
+        
+        Runs as four stages connected by bounded queues: a reader thread
+        decodes frames, a fretboard thread runs fretboard detection, this
+        thread runs the hand/finger/picking analysis, and a writer thread
+        encodes debug frames. The detectors keep state from frame to frame,
+        so each one sees frames in order on a single thread, but different
+        detectors work on different frames at the same time (OpenCV and
+        MediaPipe release the GIL). String-line detection, the one stateless
+        per-frame step, is spread over a pool of worker threads.
+        
+        After a frame without hands, hand/finger/picking analysis is skipped
+        for up to skip_stride frames unless the picture changes noticeably.
+        
+        Args:
+            input_path: Path to input file
+            output_debug: Whether to save debug visualizations
+            prefetch: Frames buffered between stages
+            skip_stride: Frames gated after a frame without hands (0 = analyze every frame)
+            motion_threshold: Mean gray-level change that ends the gate early
+        """
+        # Tracking state from a previous video must not leak into this one
+        self.hand_tracker.reset()
+        
+        logger.info("Step 1/7: Extracting frames...")
+        read_q = Queue(maxsize=prefetch)
+        write_q = Queue(maxsize=prefetch)
+        free_q = Queue()  # Annotation buffers the writer is done with
+        
+        # Set when analysis fails, so the upstream stages stop instead of
+        # blocking forever on queues nobody reads any more
+        stop = Event()
+        
+        reader = Thread(target=self._read_frames, args=(input_path, read_q, stop), daemon=True)
+        writer = Thread(target=self._write_frames, args=(write_q, free_q), daemon=True)
+        reader.start()
+        writer.start()
         
         video_notes = []
         calibration_done = False
         debug_frames_saved = 0
+        num_frames = 0
+        
+        # Hand gate: last frame index to skip, and the hand-less frame it started from
+        skip_until = -1
+        reference = None
         
         video_context = {
             'calibration_quality': 0.0,
-            'total_frames': len(frames),
-            'frames_with_detection': 0
+            'total_frames': 0,
+            'frames_with_detection': 0,
+            'frames_skipped': 0
         }
         
-        print("Step 2/7: Analyzing frames...")
+        logger.info("Step 2/7: Analyzing frames...")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as string_pool:
+                detect_q = Queue(maxsize=prefetch)
+                fretboard_stage = Thread(
+                    target=self._run_fretboard_stage,
+                    args=(read_q, detect_q, string_pool, prefetch, stop),
+                    daemon=True
+                )
+                fretboard_stage.start()
+                
+                try:
+                    for i, (frame_data, fretboard, strings) in enumerate(self._queued_frames(detect_q)):
+                        num_frames += 1
+                        
+                        # Progress
+                        if i and i % 50 == 0:
+                            logger.info(f"  → Processed {i} frames...")
+                        
+                        frame = frame_data['frame']
+                        timestamp = frame_data['timestamp']
+                        frame_shape = frame.shape
+                        
+                        # Calibrate
+                        if not calibration_done and fretboard and strings:
+                            if self.finger_mapper.calibrate(fretboard, strings, frame_shape):
+                                calibration_done = True
+                                video_context['calibration_frame'] = i
+                                video_context['calibration_quality'] = 0.9
+                                logger.info(f"  → Calibrated at frame {i}")
+                        
+                        # No hands shortly before and barely any motion since: nothing to analyze
+                        if i <= skip_until and self._motion(reference, frame) <= motion_threshold:
+                            video_context['frames_skipped'] += 1
+                            continue
+                        
+                        # Detect hands
+                        hands = self.hand_tracker.detect_hands(frame)
+                        
+                        if not hands and skip_stride:
+                            skip_until = i + skip_stride
+                            reference = self._motion_thumbnail(frame)
+                        
+                        # Map fingers
+                        hand_mappings = self.finger_mapper.map_hands_to_fretboard(hands, frame_shape)
+                        
+                        # Get fretted notes
+                        played_notes = self.finger_mapper.get_played_notes(hand_mappings)
+                        
+                        # Detect picking
+                        string_activity = self.string_detector.detect_string_activity(
+                            hands, hand_mappings, strings, frame_shape, timestamp
+                        )
+                        
+                        # Combine
+                        note_events = self.string_detector.combine_with_fretting(
+                            string_activity, played_notes
+                        )
+                        
+                        if note_events:
+                            video_context['frames_with_detection'] += 1
+                            for note in note_events:
+                                note['time'] = timestamp
+                                note['timestamp'] = timestamp
+                                video_notes.append(note)
+                        
+                        # Save debug frames (first 10 with detections)
+                        if output_debug and note_events and debug_frames_saved < 10:
+                            debug_dir = Path("data/debug/phase3_fusion")
+                            debug_dir.mkdir(exist_ok=True, parents=True)
+                            
+                            # One copy of the frame, drawn on in place; buffers come
+                            # back from the writer once saved, so they are reused
+                            # without ever being overwritten while still queued
+                            annotated = self._annotation_buffer(free_q, frame)
+                            self.fretboard_detector.draw_fretboard_region(annotated, fretboard, in_place=True)
+                            if strings:
+                                self.fretboard_detector.draw_strings(annotated, strings, in_place=True)
+                            self.finger_mapper.draw_fret_markers(annotated, in_place=True)
+                            self.hand_tracker.draw_hands_on_frame(annotated, hands, in_place=True)
+                            self.finger_mapper.draw_finger_mappings(annotated, hand_mappings, in_place=True)
+                            self.string_detector.draw_string_activity(annotated, string_activity, strings, in_place=True)
+                            
+                            # Encoding and writing happen on the writer thread
+                            output_path = debug_dir / f"detection_{debug_frames_saved:02d}_t{timestamp:.2f}s.jpg"
+                            write_q.put((annotated, output_path))
+                            debug_frames_saved += 1
+                except BaseException:
+                    # Release the reader and fretboard stages so they can be joined
+                    stop.set()
+                    raise
+                finally:
+                    fretboard_stage.join()
+        finally:
+            # Let the writer drain whatever is queued before returning
+            write_q.put(None)
+            writer.join()
+            reader.join()
         
-        for i, frame_data in enumerate(frames):
-            frame = frame_data['frame']
-            timestamp = frame_data['timestamp']
-            frame_shape = frame.shape
+        video_context['total_frames'] = num_frames
+        
+        logger.info(f"Step 3/7: Frame analysis complete")
+        logger.info(f"Step 4/7: Calibration: {'✓ Success' if calibration_done else '✗ Failed'}")
+        logger.info(f"Step 5/7: Detection rate: {video_context['frames_with_detection']}/{num_frames} frames")
+        if video_context['frames_skipped']:
+            logger.info(f"  → Skipped {video_context['frames_skipped']} still frames without hands")
+        logger.info(f"Step 6/7: Total note events: {len(video_notes)}")
+        logger.info(f"Step 7/7: Video analysis complete")
+        
+        if output_debug and debug_frames_saved > 0:
+            logger.info(f"  → Debug frames saved to data/debug/phase3_fusion/")
+        
+        return video_notes, video_context
+    
+    def _queued_frames(self, read_q: Queue, stop: Optional[Event] = None):
+        """
+        Yield items from an earlier stage's queue, re-raising its errors here
+        
+        With a stop event, also ends (without waiting for the sentinel) once
+        it is set.
+        """
+        while True:
+            try:
+                frame_data = read_q.get(timeout=0.1) if stop is not None else read_q.get()
+            except Empty:
+                if stop.is_set():
+                    return
+                continue
             
-            # Detect fretboard
-            fretboard = self.fretboard_detector.detect_fretboard(frame)
+            if frame_data is None:
+                return
+            if isinstance(frame_data, Exception):
+                raise frame_data
+            yield frame_data
+    
+    def _put_unless_stopped(self, queue: Queue, item, stop: Event) -> bool:
+        """Put item on a bounded queue, giving up once stop is set; True if queued"""
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+    
+    def _run_fretboard_stage(self, read_q: Queue, detect_q: Queue,
+                             string_pool: ThreadPoolExecutor, lookahead: int, stop: Event):
+        """Fretboard stage: (frame_data, fretboard, strings) into detect_q, then a None sentinel"""
+        try:
+            for detection in self._detect_fretboards(self._queued_frames(read_q, stop), string_pool, lookahead):
+                if not self._put_unless_stopped(detect_q, detection, stop):
+                    break
+        except Exception as e:
+            # Re-raised on the analysis thread
+            self._put_unless_stopped(detect_q, e, stop)
+        finally:
+            self._put_unless_stopped(detect_q, None, stop)
+    
+    def _detect_fretboards(self, frames, string_pool: ThreadPoolExecutor, lookahead: int,
+                           string_refresh: int = 10, min_iou: float = 0.9):
+        """
+        Detect fretboard and string lines ahead of the main analysis
+        
+        Fretboard detection only depends on earlier frames, so it runs in
+        order on the calling thread up to lookahead frames ahead; string detection
+        depends on nothing but the frame and its fretboard, so each frame's
+        is handed to the shared pool, where whichever worker is free picks
+        it up.
+        
+        Strings sit as still as the fretboard, so a detection is reused for
+        up to string_refresh frames while the fretboard bbox overlaps the
+        one it was made with by at least min_iou (a detection that found no
+        strings is never reused).
+        
+        Yields:
+            (frame_data, fretboard, strings) in frame order
+        """
+        pending = deque()
+        
+        # Last string detection (future), its fretboard bbox and age in frames
+        cached = None
+        cached_bbox = None
+        cached_age = 0
+        
+        for frame_data in frames:
+            fretboard = self.fretboard_detector.detect_fretboard(frame_data['frame'])
             
-            # Detect strings
             strings = None
             if fretboard:
-                strings = self.fretboard_detector.detect_strings(frame, fretboard)
-            
-            # Calibrate
-            if not calibration_done and fretboard and strings:
-                if self.finger_mapper.calibrate(fretboard, strings, frame_shape):
-                    calibration_done = True
-                    video_context['calibration_frame'] = i
-                    video_context['calibration_quality'] = 0.9
-                    print(f"  → Calibrated at frame {i}")
-            
-            # Detect hands
-            hands = self.hand_tracker.detect_hands(frame)
-            
-            # Map fingers
-            hand_mappings = []
-            if self.finger_mapper.is_calibrated():
-                for hand in hands:
-                    mapping = self.finger_mapper.map_hand_to_fretboard(hand, frame_shape)
-                    if mapping:
-                        hand_mappings.append(mapping)
-            
-            # Get fretted notes
-            played_notes = self.finger_mapper.get_played_notes(hand_mappings)
-            
-            # Detect picking
-            string_activity = self.string_detector.detect_string_activity(
-                hands, hand_mappings, strings, frame_shape, timestamp
-            )
-            
-            # Combine
-            note_events = self.string_detector.combine_with_fretting(
-                string_activity, played_notes
-            )
-            
-            if note_events:
-                video_context['frames_with_detection'] += 1
-                for note in note_events:
-                    note['time'] = timestamp
-                    note['timestamp'] = timestamp
-                    video_notes.append(note)
-            
-            # Save debug frames (first 10 with detections)
-            if output_debug and note_events and debug_frames_saved < 10:
-                debug_dir = Path("data/debug/phase3_fusion")
-                debug_dir.mkdir(exist_ok=True, parents=True)
-                
-                annotated = frame.copy()
-                annotated = self.fretboard_detector.draw_fretboard_region(annotated, fretboard)
-                if strings:
-                    annotated = self.fretboard_detector.draw_strings(annotated, strings)
-                annotated = self.finger_mapper.draw_fret_markers(annotated)
-                annotated = self.hand_tracker.draw_hands_on_frame(annotated, hands)
-                annotated = self.finger_mapper.draw_finger_mappings(annotated, hand_mappings)
-                annotated = self.string_detector.draw_string_activity(annotated, string_activity, strings)
+                reusable = (
+                    cached is not None
+                    and cached_age < string_refresh
+                    and _bbox_iou(fretboard['bbox'], cached_bbox) >= min_iou
+                    and not (cached.done() and not cached.result())
+                )
                 
-                output_path = debug_dir / f"detection_{debug_frames_saved:02d}_t{timestamp:.2f}s.jpg"
-                self.frame_extractor.save_frame(annotated, output_path)
-                debug_frames_saved += 1
+                if reusable:
+                    cached_age += 1
+                else:
+                    cached = string_pool.submit(
+                        self.fretboard_detector.detect_strings, frame_data['frame'], fretboard
+                    )
+                    cached_bbox = fretboard['bbox']
+                    cached_age = 1
+                strings = cached
+            pending.append((frame_data, fretboard, strings))
             
-            # Progress
-            if (i + 1) % 50 == 0:
-                print(f"  → Processed {i+1}/{len(frames)} frames...")
+            if len(pending) > lookahead:
+                frame_data, fretboard, strings = pending.popleft()
+                yield frame_data, fretboard, strings.result() if strings else None
         
-        print(f"Step 3/7: Frame analysis complete")
-        print(f"Step 4/7: Calibration: {'✓ Success' if calibration_done else '✗ Failed'}")
-        print(f"Step 5/7: Detection rate: {video_context['frames_with_detection']}/{len(frames)} frames")
-        print(f"Step 6/7: Total note events: {len(video_notes)}")
-        print(f"Step 7/7: Video analysis complete")
+        while pending:
+            frame_data, fretboard, strings = pending.popleft()
+            yield frame_data, fretboard, strings.result() if strings else None
+    
+    def _motion_thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Small grayscale version of a frame for cheap motion checks"""
+        small = cv2.resize(frame, (max(1, frame.shape[1] // 8), max(1, frame.shape[0] // 8)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    
+    def _motion(self, reference: np.ndarray, frame: np.ndarray) -> float:
+        """Mean absolute gray-level change between a reference thumbnail and a frame"""
+        return float(cv2.absdiff(reference, self._motion_thumbnail(frame)).mean())
+    
+    def _annotation_buffer(self, free_q: Queue, frame: np.ndarray) -> np.ndarray:
+        """Copy frame into a recycled annotation buffer (a new one if none fits)"""
+        try:
+            buffer = free_q.get_nowait()
+        except Empty:
+            buffer = None
         
-        if output_debug and debug_frames_saved > 0:
-            print(f"  → Debug frames saved to data/debug/phase3_fusion/")
+        if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty_like(frame)
         
-        # Cleanup
-        self.hand_tracker.close()
+        np.copyto(buffer, frame)
+        return buffer
+    
+    def _read_frames(self, input_path: Path, read_q: Queue, stop: Event):
+        """Reader stage: decode frames into read_q, then a None sentinel"""
+        frames = self.frame_extractor.extract_frames(input_path, max_frames=200)
+        try:
+            for frame_data in frames:
+                if not self._put_unless_stopped(read_q, frame_data, stop):
+                    break
+        except Exception as e:
+            # Re-raised on the analysis thread
+            self._put_unless_stopped(read_q, e, stop)
+        finally:
+            # Releases the VideoCapture even when stopped early
+            frames.close()
+            self._put_unless_stopped(read_q, None, stop)
+    
+    def _write_frames(self, write_q: Queue, free_q: Queue):
+        """
+        Writer stage: save (frame, path) items from write_q until a None sentinel
         
-        return video_notes, video_context
\ No newline at end of file
+        Each saved frame buffer is handed back through free_q for reuse.
+        """
+        for annotated, output_path in iter(write_q.get, None):
+            # Keep consuming after a failed write so the analysis thread never blocks on a full queue
+            try:
+                self.frame_extractor.save_frame(annotated, output_path)
+            except Exception as e:
+                logger.warning(f"  ⚠ Failed to save debug frame {output_path}: {e}")
+            free_q.put(annotated)
+
+
+def _process_file(job: tuple) -> dict:
+    """Worker entry point for TranscriptionPipeline.process_batch"""
+    input_path, output_debug, pipeline_kwargs = job
+    return TranscriptionPipeline(**pipeline_kwargs).process(input_path, output_debug)
@@ -1,24 +1,113 @@
 """
 Map detected pitches to guitar strings and frets
 """
+from functools import lru_cache
 import numpy as np
-from config.guitar_config import STANDARD_TUNING, NUM_FRETS, PITCH_TOLERANCE, FRET_PENALTY_WEIGHT
+from config.guitar_config import (
+    STANDARD_TUNING,
+    NUM_FRETS,
+    PITCH_TOLERANCE,
+    FRET_PENALTY_WEIGHT,
+    GUITAR_MIN_FREQ,
+    GUITAR_MAX_FREQ,
+    MIN_CONFIDENCE
+)
+
+# Octave variants tried for every detected pitch: as detected, one octave
+# down, one octave up (pitch detectors often lock onto the wrong octave)
+_OCTAVE_FACTORS = (1.0, 0.5, 2.0)
+
+# Detected frequencies that no octave variant can bring into guitar range
+# are rejected before any search
+_SEARCH_MIN_FREQ = GUITAR_MIN_FREQ / max(_OCTAVE_FACTORS)
+_SEARCH_MAX_FREQ = GUITAR_MAX_FREQ / min(_OCTAVE_FACTORS)
+
+
+def _score_all_positions(freq_candidates: np.ndarray, log2_freqs: np.ndarray,
+                         high_base: np.ndarray, low_base: np.ndarray,
+                         continuity=None):
+    """
+    Score every (candidate, string, fret) combination and pick the best
+    
+    Works on plain arrays only, so it carries no mapper state.
+    
+    Args:
+        freq_candidates: Candidate frequencies, shape (candidates,)
+        log2_freqs: log2 of every position's frequency, shape (strings, frets)
+        high_base: Position-only score terms for notes above 300 Hz
+        low_base: Position-only score terms for other notes
+        continuity: Continuity penalty of every position, or None
+        
+    Returns:
+        (candidate, string, fret, score) of the lowest score, or None if
+        no candidate is within PITCH_TOLERANCE of a position
+    """
+    test_freqs = freq_candidates[:, None, None]
+    
+    # Frequency accuracy (in cents), shape (candidates, strings, frets); a
+    # difference of logs, so only the candidates need a log2. The same pitch
+    # on adjacent strings (and across octave candidates) ties exactly, so the
+    # cents are rounded: rounding noise must not decide those ties, the
+    # first combination in (candidate, string, fret) order does
+    log2_candidates = np.log2(freq_candidates)[:, None, None]
+    cents_diff = np.round(np.abs(1200 * (log2_candidates - log2_freqs[None])), 9)
+    
+    # Fret penalty and string preference
+    position_score = np.where(test_freqs > 300, high_base, low_base)
+    
+    # Continuity: prefer positions close to last note
+    if continuity is not None:
+        position_score = position_score + continuity
+    
+    # Frequency error added last, in one step, so positions with equal
+    # position terms and equal cents get bit-identical totals
+    score = cents_diff + position_score
+    
+    # Skip frequencies outside guitar range and positions out of tolerance
+    in_range = (freq_candidates >= GUITAR_MIN_FREQ) & (freq_candidates <= GUITAR_MAX_FREQ)
+    score[(cents_diff > PITCH_TOLERANCE) | ~in_range[:, None, None]] = np.inf
+    
+    best = np.argmin(score)
+    if score.flat[best] == np.inf:
+        return None
+    
+    candidate, string, fret = np.unravel_index(best, score.shape)
+    return int(candidate), int(string), int(fret), float(score.flat[best])
 
 
 class GuitarMapper:
     """Map pitches to guitar strings and fret positions"""
     
-    def __init__(self, tuning=None):
+    # Fretboard tables built by _build_fretboard, shared by every mapper
+    # with the same tuning (the arrays are read-only)
+    _FRETBOARD_ATTRS = ('fretboard', 'fret_freqs', '_log2_freqs', 'string_idx', 'fret_idx',
+                        '_base_score_high', '_base_score_low', '_continuity')
+    _fretboard_cache = {}
+    
+    def __init__(self, tuning=None, position_cache_cents=5):
         """
         Args:
             tuning: Guitar tuning (defaults to standard tuning)
+            position_cache_cents: Width of the pitch buckets position searches
+                                  are memoized by (None = search every pitch exactly)
         """
         self.tuning = tuning or STANDARD_TUNING
         self._build_fretboard()
         self.last_position = None  # Track last note for position continuity
+        
+        # Played notes cluster on a few dozen pitches, so most searches repeat
+        self.position_cache_cents = position_cache_cents
+        self._cached_search = lru_cache(maxsize=4096)(self._search_bucket)
     
     def _build_fretboard(self):
         """Build a mapping of all possible notes on the fretboard"""
+        key = tuple(self.tuning)
+        cached = GuitarMapper._fretboard_cache.get(key)
+        if cached is not None:
+            for name, value in zip(self._FRETBOARD_ATTRS, cached):
+                setattr(self, name, value)
+            return
+        
         self.fretboard = []
         
         for string_idx, (note, octave) in enumerate(self.tuning):
@@ -35,6 +124,28 @@ class GuitarMapper:
                 })
             
             self.fretboard.append(string_notes)
+        
+        # Array form of the same table for the vectorized position search
+        self.fret_freqs = np.array([[n['frequency'] for n in string_notes] for string_notes in self.fretboard])
+        self._log2_freqs = np.log2(self.fret_freqs)
+        self.string_idx = np.arange(len(self.fretboard))[:, None]
+        self.fret_idx = np.arange(NUM_FRETS + 1)[None, :]
+        
+        # Position-only score terms (fret penalty + string preference), one
+        # table per side of the 300 Hz split
+        fret_penalty = self.fret_idx * FRET_PENALTY_WEIGHT
+        self._base_score_high = fret_penalty + (5 - self.string_idx) * 2  # Prefer strings 4, 5
+        self._base_score_low = fret_penalty + self.string_idx * 2  # Prefer strings 0, 1, 2
+        
+        # Continuity penalty for every (last string, last fret, string, fret)
+        string_distance = np.abs(self.string_idx[:, :, None, None] - self.string_idx[None, None])
+        fret_distance = np.abs(self.fret_idx[:, :, None, None] - self.fret_idx[None, None])
+        self._continuity = string_distance * 3 + fret_distance * 0.5
+        
+        for name in self._FRETBOARD_ATTRS[1:]:
+            getattr(self, name).setflags(write=False)
+        
+        GuitarMapper._fretboard_cache[key] = tuple(getattr(self, name) for name in self._FRETBOARD_ATTRS)
     
     def _note_to_freq(self, note: str, octave: int) -> float:
         """Convert note name and octave to frequency"""
@@ -50,79 +161,84 @@ class GuitarMapper:
         
         return a4_freq * (2 ** (semitones_from_a4 / 12))
     
-    def _calculate_position_score(self, note_info, frequency):
-        """
-        Score a position based on multiple factors
-        Lower score is better
+    def _find_best_position(self, frequency: float):
         """
-        if note_info['frequency'] <= 0:
-            return float('inf')
-        
-        # Frequency accuracy (in cents)
-        cents_diff = abs(1200 * np.log2(frequency / note_info['frequency']))
-        
-        if cents_diff > PITCH_TOLERANCE:
-            return float('inf')
+        Find the best string/fret combination for a frequency
         
-        # Start with frequency error
-        score = cents_diff
+        Searches are memoized by (pitch bucket, last position): pitches within
+        the same position_cache_cents-wide bucket share the search result of
+        the bucket's center pitch.
+        """
+        # Frequencies outside guitar range (or unvoiced frames) have no position
+        if not _SEARCH_MIN_FREQ <= frequency <= _SEARCH_MAX_FREQ:
+            return None
         
-        # Penalty for high frets (prefer lower frets)
-        fret_penalty = note_info['fret'] * FRET_PENALTY_WEIGHT
-        score += fret_penalty
+        last = None
+        if self.last_position:
+            last = (self.last_position['string'], self.last_position['fret'])
         
-        # Prefer higher strings for higher notes (more natural)
-        # Lower string index = lower pitch string
-        # So for higher frequencies, prefer higher string indices
-        if frequency > 300:  # Roughly above D4
-            string_preference = (5 - note_info['string']) * 2  # Prefer strings 4, 5
+        if self.position_cache_cents:
+            bucket = int(round(1200 * np.log2(frequency / 55.0) / self.position_cache_cents))
+            found = self._cached_search(bucket, last)
         else:
-            string_preference = note_info['string'] * 2  # Prefer strings 0, 1, 2
+            found = self._search_position(frequency, last)
         
-        score += string_preference
+        if found is None:
+            return None
         
-        # Continuity: prefer positions close to last note
-        if self.last_position:
-            string_distance = abs(note_info['string'] - self.last_position['string'])
-            fret_distance = abs(note_info['fret'] - self.last_position['fret'])
-            position_change_penalty = string_distance * 3 + fret_distance * 0.5
-            score += position_change_penalty
+        # The search only passes primitives around; the winner is the one
+        # dict built per call
+        octave_factor, string, fret = found
+        best_match = {
+            'string': string,
+            'fret': fret,
+            'frequency': float(self.fret_freqs[string, fret]),
+            'detected_freq': frequency,
+            'corrected_freq': frequency * octave_factor
+        }
         
-        return score
+        # Update last position for continuity
+        self.last_position = best_match
+        
+        return best_match
     
-    def _find_best_position(self, frequency: float):
-        """Find the best string/fret combination for a frequency"""
-        best_match = None
-        best_score = float('inf')
+    def _search_bucket(self, bucket: int, last):
+        """Position search for the center pitch of a cache bucket"""
+        return self._search_position(55.0 * 2 ** (bucket * self.position_cache_cents / 1200), last)
+    
+    def _search_position(self, frequency: float, last):
+        """
+        Score every (octave candidate, string, fret) combination at once
         
-        # Check for octave errors (common in pitch detection)
-        # Try the detected frequency and its octave variants
-        freq_candidates = [
-            frequency,
-            frequency / 2,  # One octave down
-            frequency * 2,  # One octave up
-        ]
-        
-        for test_freq in freq_candidates:
-            # Skip frequencies outside guitar range
-            if test_freq < 80 or test_freq > 1200:
-                continue
+        Scoring is done by _score_all_positions; ties go to the first
+        combination in that order, as with a nested loop.
+        
+        Args:
+            frequency: Detected frequency
+            last: (string, fret) of the previous note, or None
             
-            for string_notes in self.fretboard:
-                for note_info in string_notes:
-                    score = self._calculate_position_score(note_info, test_freq)
-                    
-                    if score < best_score:
-                        best_score = score
-                        best_match = note_info.copy()
-                        best_match['detected_freq'] = frequency
-                        best_match['corrected_freq'] = test_freq
+        Returns:
+            (octave factor, string, fret) of the best position, or None
+        """
+        # Check for octave errors (common in pitch detection)
+        freq_candidates = frequency * np.array(_OCTAVE_FACTORS)
         
-        # Update last position for continuity
-        if best_match:
-            self.last_position = best_match
+        # Skip frequencies outside guitar range
+        if not ((freq_candidates >= GUITAR_MIN_FREQ) & (freq_candidates <= GUITAR_MAX_FREQ)).any():
+            return None
         
-        return best_match
+        best = _score_all_positions(
+            freq_candidates,
+            self._log2_freqs,
+            self._base_score_high,
+            self._base_score_low,
+            self._continuity[last] if last is not None else None
+        )
+        if best is None:
+            return None
+        
+        candidate, string, fret, _ = best
+        return _OCTAVE_FACTORS[candidate], string, fret
     
     def map_to_guitar(self, frequencies, confidences, times, onset_times):
         """
@@ -140,38 +256,47 @@ class GuitarMapper:
         notes = []
         self.last_position = None  # Reset position tracking
         
-        # Group frequencies by onset times
-        for i, onset_time in enumerate(onset_times):
-            # Find frequencies near this onset
-            if i < len(onset_times) - 1:
-                next_onset = onset_times[i + 1]
-            else:
-                next_onset = times[-1] if len(times) > 0 else onset_time + 1.0
+        frequencies = np.asarray(frequencies)
+        confidences = np.asarray(confidences)
+        times = np.asarray(times)
+        onset_times = np.asarray(onset_times, dtype=np.float64)
+        if len(onset_times) == 0:
+            return notes
+        
+        # Each onset's window runs to the next onset (the last one to the
+        # final frame); times are sorted, so every window is a contiguous run
+        # of frames found by binary search instead of a mask over all frames
+        last_end = times[-1] if len(times) > 0 else onset_times[-1] + 1.0
+        next_onsets = np.append(onset_times[1:], last_end)
+        starts = np.searchsorted(times, onset_times, side='left')
+        ends = np.searchsorted(times, next_onsets, side='left')
+        
+        for onset_time, next_onset, start, end in zip(onset_times.tolist(), next_onsets.tolist(),
+                                                      starts.tolist(), ends.tolist()):
+            # Skip windows without frequencies
+            if end <= start:
+                continue
+            
+            # Use the most confident frequency in this window (argmax over a
+            # slice view, then index the full arrays; nothing is copied)
+            best_idx = start + int(np.argmax(confidences[start:end]))
+            freq = frequencies[best_idx]
             
-            # Get frequencies in this time window
-            mask = (times >= onset_time) & (times < next_onset)
-            if not np.any(mask):
+            # Noise: too unsure, or no octave of it is playable
+            if confidences[best_idx] <= MIN_CONFIDENCE or not _SEARCH_MIN_FREQ <= freq <= _SEARCH_MAX_FREQ:
                 continue
             
-            window_freqs = frequencies[mask]
-            window_confs = confidences[mask]
+            # Map to guitar position
+            position = self._find_best_position(freq)
             
-            # Use the most confident frequency in this window
-            if len(window_freqs) > 0:
-                best_idx = np.argmax(window_confs)
-                freq = window_freqs[best_idx]
-                
-                # Map to guitar position
-                position = self._find_best_position(freq)
-                
-                if position and position['fret'] <= NUM_FRETS:
-                    notes.append({
-                        'time': onset_time,
-                        'duration': next_onset - onset_time,
-                        'string': position['string'],
-                        'fret': position['fret'],
-                        'frequency': freq,
-                        'confidence': window_confs[best_idx]
-                    })
+            if position and position['fret'] <= NUM_FRETS:
+                notes.append({
+                    'time': onset_time,
+                    'duration': next_onset - onset_time,
+                    'string': position['string'],
+                    'fret': position['fret'],
+                    'frequency': freq,
+                    'confidence': confidences[best_idx]
+                })
         
         return notes
\ No newline at end of file
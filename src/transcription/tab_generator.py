@@ -8,6 +8,11 @@ import numpy as np
 class TabGenerator:
     """Generate ASCII tab format from note data"""
     
+    # Output layout, shared by every generate() call
+    STRING_NAMES = ('e', 'B', 'G', 'D', 'A', 'E')  # High to low
+    HEADER = "=" * 70
+    TITLE = f"{HEADER}\nGUITAR TAB - Multimodal Transcription\n{HEADER}\n"
+    
     def __init__(self, chars_per_second=8):
         """
         Args:
@@ -48,57 +53,16 @@ class TabGenerator:
                       for note in valid_notes)
         tab_length = int(max_time * self.chars_per_second) + 20
         
-        # Initialize tab lines (one per string)
-        tab_lines = []
-        string_names = ['e', 'B', 'G', 'D', 'A', 'E']  # High to low
-        
-        for i in range(NUM_STRINGS):
-            tab_lines.append(['-'] * tab_length)
-        
-        # Track positions to avoid overlaps
-        occupied = [set() for _ in range(NUM_STRINGS)]
+        # Initialize tab lines (one row of ASCII codes per string)
+        tab_lines = np.full((NUM_STRINGS, tab_length), ord('-'), dtype=np.uint8)
         
         # Place notes on the tab
-        notes_placed = 0
-        for note in valid_notes:
-            position = int(note.get('time', 0) * self.chars_per_second)
-            
-            if position >= tab_length:
-                continue
-            
-            string_idx = NUM_STRINGS - 1 - note.get('string')  # Reverse for display
-            fret = note.get('fret')
-            fret_str = str(fret)
-            
-            # Check if position is available (not too close to another note)
-            available = True
-            for offset in range(len(fret_str)):
-                if position + offset in occupied[string_idx]:
-                    available = False
-                    break
-            
-            if not available:
-                # Try next position
-                position += 1
-                if position >= tab_length:
-                    continue
-            
-            # Place the note
-            for j, char in enumerate(fret_str):
-                if position + j < tab_length:
-                    tab_lines[string_idx][position + j] = char
-                    occupied[string_idx].add(position + j)
-            
-            notes_placed += 1
+        notes_placed = self._place_notes(tab_lines, valid_notes)
         
         print(f"[Tab Generator] Placed {notes_placed} notes on tab")
         
         # Build output string
-        output = []
-        output.append("=" * 70)
-        output.append("GUITAR TAB - Multimodal Transcription")
-        output.append("=" * 70)
-        output.append("")
+        output = [self.TITLE]
         
         # Add metadata if available
         if valid_notes and 'source' in valid_notes[0]:
@@ -113,9 +77,8 @@ class TabGenerator:
             output.append("")
         
         # Add the tab
-        for i, line in enumerate(tab_lines):
-            string_name = string_names[i]
-            tab_line = f"{string_name}|{''.join(line)}"
+        for string_name, line in zip(self.STRING_NAMES, tab_lines):
+            tab_line = f"{string_name}|{line.tobytes().decode('ascii')}"
             output.append(tab_line)
         
         output.append("")
@@ -131,6 +94,88 @@ class TabGenerator:
             avg_conf = sum(confidences) / len(confidences)
             output.append(f"Average confidence: {avg_conf:.2f}")
         
-        output.append("=" * 70)
+        output.append(self.HEADER)
+        
+        return '\n'.join(output)
+    
+    def _place_notes(self, tab_lines: np.ndarray, notes: list) -> int:
+        """
+        Write the fret numbers of notes into the tab buffer
+        
+        A note whose cells are already taken moves one cell to the right.
+        Only notes close enough on the same string to collide depend on each
+        other; all others are written at once with fancy indexing and just
+        the colliding clusters are placed one by one, in note order.
+        
+        Args:
+            tab_lines: (NUM_STRINGS, tab_length) uint8 buffer, written in place
+            notes: Valid notes (string and fret set)
+            
+        Returns:
+            Number of notes placed
+        """
+        tab_length = tab_lines.shape[1]
+        
+        times = np.fromiter((n.get('time', 0) for n in notes), dtype=np.float64, count=len(notes))
+        positions = (times * self.chars_per_second).astype(np.int64)
+        string_idx = NUM_STRINGS - 1 - np.fromiter((n['string'] for n in notes), dtype=np.int64, count=len(notes))  # Reverse for display
+        
+        # Fret digits as an (notes, max width) array of ASCII codes
+        fret_strs = [str(n['fret']) for n in notes]
+        widths = np.fromiter(map(len, fret_strs), dtype=np.int64, count=len(notes))
+        max_width = int(widths.max())
+        fret_chars = np.frombuffer(
+            ''.join(f.ljust(max_width) for f in fret_strs).encode('ascii'), dtype=np.uint8
+        ).reshape(len(notes), max_width)
+        
+        # A note reads and writes only cells position..position + width (one
+        # shift included), so notes whose ranges do not overlap any other
+        # range on their string can never collide
+        stride = tab_length + max_width + 1
+        starts = string_idx * stride + positions
+        order = np.argsort(starts, kind='stable')
+        sorted_starts = starts[order]
+        reach = np.maximum.accumulate(sorted_starts + widths[order])
+        new_cluster = np.ones(len(notes), dtype=bool)
+        new_cluster[1:] = sorted_starts[1:] > reach[:-1]
+        cluster_id = np.cumsum(new_cluster)
+        cluster_sizes = np.bincount(cluster_id)
+        
+        isolated = np.empty(len(notes), dtype=bool)
+        isolated[order] = cluster_sizes[cluster_id] == 1
+        
+        # Isolated notes: write every digit column at once (clipped at the end of the tab)
+        free = isolated & (positions < tab_length)
+        for offset in range(max_width):
+            cols = free & (widths > offset) & (positions + offset < tab_length)
+            tab_lines[string_idx[cols], positions[cols] + offset] = fret_chars[cols, offset]
+        
+        notes_placed = int(free.sum())
+        
+        # Colliding notes: track positions to avoid overlaps (one flag per tab cell)
+        occupied = np.zeros(tab_lines.shape, dtype=np.bool_)
+        
+        for i in np.flatnonzero(~isolated).tolist():
+            position = int(positions[i])
+            
+            if position >= tab_length:
+                continue
+            
+            row = int(string_idx[i])
+            width = int(widths[i])
+            
+            # Check if position is available (not too close to another note)
+            if occupied[row, position:position + width].any():
+                # Try next position
+                position += 1
+                if position >= tab_length:
+                    continue
+            
+            # Place the note (clipped at the end of the tab)
+            end = min(position + width, tab_length)
+            tab_lines[row, position:end] = fret_chars[i, :end - position]
+            occupied[row, position:end] = True
+            
+            notes_placed += 1
         
-        return '\n'.join(output)
\ No newline at end of file
+        return notes_placed
\ No newline at end of file
@@ -3,7 +3,168 @@ Map finger positions to guitar strings and frets - Phase 2.3
 """
 import numpy as np
 from typing import List, Dict, Optional, Tuple
-from config.guitar_config import NUM_STRINGS, NUM_FRETS
+from config.guitar_config import NUM_STRINGS, NUM_FRETS, FRET_SCALE_RATIO
+
+# Finger names with their MediaPipe tip and base landmark indices
+FINGER_NAMES = ('thumb', 'index', 'middle', 'ring', 'pinky')
+FINGERTIP_LANDMARKS = [4, 8, 12, 16, 20]
+FINGER_BASE_LANDMARKS = [2, 5, 9, 13, 17]
+
+# One record per finger of a mapped hand (rows in FINGER_NAMES order);
+# string and fret are only meaningful where pressing is set
+FINGER_DTYPE = np.dtype([
+    ('finger', 'i1'),
+    ('string', 'i2'),
+    ('fret', 'i2'),
+    ('x', 'i4'),
+    ('y', 'i4'),
+    ('conf', 'f8'),
+    ('pressing', '?')
+])
+
+# Filled disk drawn at each mapped fingertip, stamped by slicing
+MARKER_RADIUS = 8
+_MARKER_DISK = (np.mgrid[-MARKER_RADIUS:MARKER_RADIUS + 1, -MARKER_RADIUS:MARKER_RADIUS + 1] ** 2).sum(axis=0) <= MARKER_RADIUS ** 2
+
+
+def _stamp_disk(image: np.ndarray, x: int, y: int, color: Tuple) -> None:
+    """Paint the marker disk centered on (x, y), clipped at the image edges"""
+    r = MARKER_RADIUS
+    h, w = image.shape[:2]
+    x0, y0 = max(0, x - r), max(0, y - r)
+    x1, y1 = min(w, x + r + 1), min(h, y + r + 1)
+    
+    if x0 >= x1 or y0 >= y1:
+        return
+    
+    mask = _MARKER_DISK[y0 - (y - r):y1 - (y - r), x0 - (x - r):x1 - (x - r)]
+    image[y0:y1, x0:x1][mask] = color
+
+
+def _pressing_mask(tips: np.ndarray, bases: np.ndarray, bounds: Tuple) -> np.ndarray:
+    """
+    Which fingers are pressing: tip on the fretboard and finger extended
+    
+    Args:
+        tips: (N, 2) fingertip pixel positions
+        bases: (N, 2) finger base pixel positions
+        bounds: (x0, y0, x1, y1) fretboard bounds, tolerance included
+    """
+    x0, y0, x1, y1 = bounds
+    
+    # Fingertip on fretboard
+    on_fretboard = ((tips[:, 0] >= x0) & (tips[:, 0] <= x1) &
+                    (tips[:, 1] >= y0) & (tips[:, 1] <= y1))
+    
+    # Finger reasonably extended (squared, no sqrt needed)
+    extension = tips - bases
+    distance_sq = (extension * extension).sum(axis=1)
+    
+    return on_fretboard & (distance_sq > 40 * 40)  # pixels
+
+
+def _closest_strings(points: np.ndarray, string_terms: Tuple) -> np.ndarray:
+    """
+    Closest string segment of every point
+    
+    Args:
+        points: (N, 2) array of (x, y) positions in pixels
+        string_terms: (x1, y1, dx, dy, length_sq) arrays, one entry per string
+        
+    Returns:
+        (N,) array of string indices, -1 where no string is within 30 pixels
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x1, y1, dx, dy, length_sq = string_terms
+    
+    if len(points) == 0 or len(length_sq) == 0:
+        return np.full(len(points), -1, dtype=np.int64)
+    
+    # Vector from every segment start to every point, shape (N, strings)
+    offset_x = points[:, 0:1] - x1
+    offset_y = points[:, 1:2] - y1
+    
+    # Parameter t of projection of every point onto every segment; a
+    # zero-length segment is a point, so t = 0
+    t = np.divide(offset_x * dx + offset_y * dy, length_sq,
+                  out=np.zeros(offset_x.shape), where=length_sq > 0)
+    t = np.clip(t, 0, 1)
+    
+    # Squared distance from each point to the closest point on each
+    # segment; ordering and thresholds need no sqrt
+    error_x = offset_x - t * dx
+    error_y = offset_y - t * dy
+    distance_sq = error_x * error_x + error_y * error_y
+    
+    # Only accept strings within a reasonable distance (30 pixels)
+    closest_string = np.argmin(distance_sq, axis=1)
+    closest_string[distance_sq.min(axis=1) >= 30 * 30] = -1
+    
+    return closest_string
+
+
+def _closest_frets(xs: np.ndarray, frets: np.ndarray) -> np.ndarray:
+    """
+    Fret of every x position
+    
+    Fret positions increase along the neck, so the nearest fret is one of
+    the two around each x, found by binary search.
+    
+    Args:
+        xs: (N,) array of x positions in pixels
+        frets: Sorted fret x positions
+        
+    Returns:
+        (N,) array of fret numbers
+    """
+    xs = np.asarray(xs)
+    last = len(frets) - 1
+    
+    # frets[idx - 1] < x <= frets[idx]
+    idx = np.searchsorted(frets, xs, side='left')
+    left = np.clip(idx - 1, 0, last)
+    right = np.clip(idx, 0, last)
+    
+    # Nearest of the two, the lower fret on a tie
+    use_left = (idx > 0) & ((idx > last) | (xs - frets[left] <= frets[right] - xs))
+    closest_fret = np.where(use_left, left, right)
+    
+    # Narrow fretboards can round neighbouring frets to the same pixel;
+    # the lowest of those wins, as in a linear scan
+    closest_fret = np.searchsorted(frets, frets[closest_fret], side='left')
+    
+    # Adjust for "between frets" positions: a finger not past its closest
+    # fret (towards bridge) sits between the previous fret and this one,
+    # so choose the one closer to nut (lower fret)
+    return np.where((closest_fret > 0) & (xs <= frets[closest_fret]), closest_fret - 1, closest_fret)
+
+
+def _map_fingers(tips: np.ndarray, bases: np.ndarray, bounds: Tuple,
+                 string_terms: Tuple, frets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    String and fret of every finger
+    
+    Works on plain arrays only, so it carries no mapper state.
+    
+    Args:
+        tips: (N, 2) fingertip pixel positions
+        bases: (N, 2) finger base pixel positions
+        bounds: (x0, y0, x1, y1) fretboard bounds for fingertips
+        string_terms: (x1, y1, dx, dy, length_sq) arrays, one entry per string
+        frets: Sorted fret x positions
+        
+    Returns:
+        (strings, frets), each of shape (N,); string is -1 for fingers that
+        are not pressing or not on a string (their fret is meaningless)
+    """
+    strings = np.full(len(tips), -1, dtype=np.int64)
+    fret_nums = np.zeros(len(tips), dtype=np.int64)
+    
+    pressing_idx = np.flatnonzero(_pressing_mask(tips, bases, bounds))
+    strings[pressing_idx] = _closest_strings(tips[pressing_idx], string_terms)
+    fret_nums[pressing_idx] = _closest_frets(tips[pressing_idx, 0], frets)
+    
+    return strings, fret_nums
 
 
 class FingerMapper:
@@ -29,23 +190,43 @@ class FingerMapper:
         self.fretboard_region = fretboard_info['bbox']
         self.string_lines = string_lines
         
+        # (strings, 4) array of (x1, y1, x2, y2), and the per-string terms of
+        # the batched distance kernel as one contiguous array each
+        self._strings_np = np.asarray(string_lines, dtype=np.float64).reshape(-1, 4)
+        self._string_x1 = self._strings_np[:, 0].copy()
+        self._string_y1 = self._strings_np[:, 1].copy()
+        self._string_dx = self._strings_np[:, 2] - self._string_x1
+        self._string_dy = self._strings_np[:, 3] - self._string_y1
+        self._string_len_sq = self._string_dx * self._string_dx + self._string_dy * self._string_dy
+        self._string_terms = (self._string_x1, self._string_y1,
+                              self._string_dx, self._string_dy, self._string_len_sq)
+        
         # Calculate fret positions (approximate)
         x, y, w, h = self.fretboard_region
         
-        # Frets get closer together as you go up the neck
-        # Use exponential spacing to approximate real fret positions
-        self.fret_positions = []
+        # Derived region constants: center, and (x0, y0, x1, y1) bounds for
+        # the wrist (50 px) and fingertip (30 px) proximity tolerances
+        self._fb_center_x = x + w / 2
+        self._fb_bounds = {
+            tolerance: (x - tolerance, y - tolerance, x + w + tolerance, y + h + tolerance)
+            for tolerance in (30, 50)
+        }
+        
+        # Frets get closer together as you go up the neck (Mersenne's law:
+        # fret i leaves a vibrating length of scale / 2^(i/12) to the saddle).
+        # The nut is the bbox's left edge and the scale length a fixed
+        # fraction of its width; nut and saddle are not detected themselves
         
         # Calculate fret spacing (12th root of 2 for equal temperament)
         fret_constant = 2 ** (1/12)
         
-        for fret_num in range(NUM_FRETS + 1):
-            # Distance from nut to fret
-            # Scale length * (1 - (1 / 2^(fret/12)))
-            ratio = 1 - (1 / (fret_constant ** fret_num))
-            fret_x = x + int(w * ratio * 0.85)  # 0.85 because we don't see full neck
-            
-            self.fret_positions.append(fret_x)
+        # Distance from nut to every fret at once:
+        # Scale length * (1 - (1 / 2^(fret/12)))
+        ratio = 1 - (1 / (fret_constant ** np.arange(NUM_FRETS + 1, dtype=np.float64)))
+        
+        # Sorted array form for binary-search fret lookup (truncated like int())
+        self._fret_positions_np = x + (w * ratio * FRET_SCALE_RATIO).astype(np.int64)
+        self.fret_positions = self._fret_positions_np.tolist()
         
         return True
     
@@ -60,8 +241,27 @@ class FingerMapper:
         Returns:
             Dictionary with finger-to-string/fret mappings or None
         """
-        if not self.is_calibrated():
-            return None
+        mappings = self.map_hands_to_fretboard([hand_data], frame_shape)
+        
+        return mappings[0] if mappings else None
+    
+    def map_hands_to_fretboard(self, hands: List[Dict], frame_shape: Tuple) -> List[Dict]:
+        """
+        Map all detected hands of a frame to fretboard positions
+        
+        The fingertips of every hand over the fretboard go through the
+        pressing check and the string and fret lookups as one batch.
+        
+        Args:
+            hands: Hand detection data with landmarks
+            frame_shape: Shape of the frame (height, width, channels)
+            
+        Returns:
+            Mappings (as from map_hand_to_fretboard) of the hands that have
+            one, in hand order
+        """
+        if not self.is_calibrated() or not hands:
+            return []
         
         h, w = frame_shape[:2]
         
@@ -70,95 +270,86 @@ class FingerMapper:
         # - Left hand (labeled "Right" by MediaPipe due to camera flip) is on fretboard
         # - Right hand (labeled "Left" by MediaPipe) is picking/strumming
         
-        hand_label = hand_data['label']
-        
-        # Check if hand is over fretboard
-        wrist = hand_data['landmarks'][0]
-        wrist_x = int(wrist['x'] * w)
-        wrist_y = int(wrist['y'] * h)
-        
-        if not self._is_point_near_fretboard(wrist_x, wrist_y):
-            return None
-        
-        # Get fingertip positions in pixel coordinates
-        landmarks = hand_data['landmarks']
-        
-        fingertips_pixel = {
-            'thumb': (int(landmarks[4]['x'] * w), int(landmarks[4]['y'] * h)),
-            'index': (int(landmarks[8]['x'] * w), int(landmarks[8]['y'] * h)),
-            'middle': (int(landmarks[12]['x'] * w), int(landmarks[12]['y'] * h)),
-            'ring': (int(landmarks[16]['x'] * w), int(landmarks[16]['y'] * h)),
-            'pinky': (int(landmarks[20]['x'] * w), int(landmarks[20]['y'] * h))
-        }
-        
-        # Get finger base positions (for detecting pressed vs lifted fingers)
-        finger_bases = {
-            'thumb': (int(landmarks[2]['x'] * w), int(landmarks[2]['y'] * h)),
-            'index': (int(landmarks[5]['x'] * w), int(landmarks[5]['y'] * h)),
-            'middle': (int(landmarks[9]['x'] * w), int(landmarks[9]['y'] * h)),
-            'ring': (int(landmarks[13]['x'] * w), int(landmarks[13]['y'] * h)),
-            'pinky': (int(landmarks[17]['x'] * w), int(landmarks[17]['y'] * h))
-        }
-        
-        # Map each finger to string and fret
-        finger_mappings = {}
+        over_fretboard = []  # (hand_data, wrist_x)
+        tips = []
+        bases = []
         
-        for finger_name, tip_pos in fingertips_pixel.items():
-            base_pos = finger_bases[finger_name]
+        for hand_data in hands:
+            # All 21 landmarks in pixel coordinates at once (truncated like int(),
+            # scaled in float64 so rounding matches the scalar path)
+            coords = np.asarray(hand_data['landmarks'], dtype=np.float64)
+            landmarks_px = (coords[:, :2] * (w, h)).astype(np.int32)
             
-            # Check if finger is pressing (tip is closer to fretboard than base)
-            is_pressing = self._is_finger_pressing(tip_pos, base_pos, hand_label)
+            # Check if hand is over fretboard
+            wrist_x, wrist_y = landmarks_px[0].tolist()
             
-            if is_pressing:
-                string_idx = self._find_closest_string(tip_pos)
-                fret_num = self._find_closest_fret(tip_pos)
-                
-                if string_idx is not None and fret_num is not None:
-                    finger_mappings[finger_name] = {
-                        'string': string_idx,
-                        'fret': fret_num,
-                        'position': tip_pos,
-                        'confidence': hand_data['score']
-                    }
-        
-        if not finger_mappings:
-            return None
-        
-        return {
-            'hand_label': hand_label,
-            'finger_mappings': finger_mappings,
-            'hand_type': 'fretting' if self._is_fretting_hand(hand_label, wrist_x) else 'picking'
-        }
+            if not self._is_point_near_fretboard(wrist_x, wrist_y):
+                continue
+            
+            # Fingertip and finger base positions (bases tell pressed from lifted fingers)
+            over_fretboard.append((hand_data, wrist_x))
+            tips.append(landmarks_px[FINGERTIP_LANDMARKS])
+            bases.append(landmarks_px[FINGER_BASE_LANDMARKS])
+        
+        if not over_fretboard:
+            return []
+        
+        # Five consecutive rows per hand
+        tips = np.concatenate(tips)
+        bases = np.concatenate(bases)
+        
+        # String and fret of every pressing finger, in one pass over plain arrays
+        strings, frets = _map_fingers(tips, bases, self._fb_bounds[30],
+                                      self._string_terms, self._fret_positions_np)
+        mapped = strings >= 0
+        
+        # Every finger as a FINGER_DTYPE record, five rows per hand
+        fingers = np.zeros(len(tips), dtype=FINGER_DTYPE)
+        fingers['finger'] = np.tile(np.arange(len(FINGERTIP_LANDMARKS)), len(over_fretboard))
+        fingers['x'] = tips[:, 0]
+        fingers['y'] = tips[:, 1]
+        fingers['conf'] = np.repeat([hand_data['score'] for hand_data, _ in over_fretboard],
+                                    len(FINGERTIP_LANDMARKS))
+        fingers['string'] = np.where(mapped, strings, 0)
+        fingers['fret'] = np.where(mapped, frets, 0)
+        fingers['pressing'] = mapped
+        fingers = fingers.reshape(len(over_fretboard), len(FINGERTIP_LANDMARKS))
+        
+        # Map each pressing finger to string and fret
+        finger_mappings = [{} for _ in over_fretboard]
+        
+        for point in np.flatnonzero(mapped).tolist():
+            hand_id, finger = divmod(point, len(FINGERTIP_LANDMARKS))
+            finger_mappings[hand_id][FINGER_NAMES[finger]] = {
+                'string': int(strings[point]),
+                'fret': int(frets[point]),
+                'position': tuple(tips[point].tolist()),
+                'confidence': over_fretboard[hand_id][0]['score']
+            }
+        
+        return [
+            {
+                'hand_label': hand_data['label'],
+                'finger_mappings': mappings,
+                'fingers': hand_fingers,
+                'hand_type': 'fretting' if self._is_fretting_hand(hand_data['label'], wrist_x) else 'picking'
+            }
+            for (hand_data, wrist_x), mappings, hand_fingers in zip(over_fretboard, finger_mappings, fingers)
+            if mappings
+        ]
     
     def _is_point_near_fretboard(self, x: int, y: int, tolerance: int = 50) -> bool:
         """Check if a point is near the fretboard region"""
         if not self.fretboard_region:
             return False
         
-        fb_x, fb_y, fb_w, fb_h = self.fretboard_region
+        bounds = self._fb_bounds.get(tolerance)
+        if bounds is None:
+            fb_x, fb_y, fb_w, fb_h = self.fretboard_region
+            bounds = (fb_x - tolerance, fb_y - tolerance, fb_x + fb_w + tolerance, fb_y + fb_h + tolerance)
+        x0, y0, x1, y1 = bounds
         
-        return (fb_x - tolerance <= x <= fb_x + fb_w + tolerance and
-                fb_y - tolerance <= y <= fb_y + fb_h + tolerance)
-    
-    def _is_finger_pressing(self, tip_pos: Tuple, base_pos: Tuple, hand_label: str) -> bool:
-        """
-        Determine if a finger is pressing down on the fretboard
-        
-        For fretting hand, tip should be lower (higher y value) than base
-        """
-        tip_x, tip_y = tip_pos
-        base_x, base_y = base_pos
-        
-        # Check if fingertip is on fretboard
-        if not self._is_point_near_fretboard(tip_x, tip_y, tolerance=30):
-            return False
-        
-        # For pressing, fingertip should be extended and closer to strings
-        # This is a simplified heuristic
-        distance = np.sqrt((tip_x - base_x)**2 + (tip_y - base_y)**2)
-        
-        # Finger should be reasonably extended
-        return distance > 40  # pixels
+        return x0 <= x <= x1 and y0 <= y <= y1
     
     def _is_fretting_hand(self, hand_label: str, wrist_x: int) -> bool:
         """
@@ -173,109 +364,8 @@ class FingerMapper:
         if not self.fretboard_region:
             return False
         
-        fb_x, fb_y, fb_w, fb_h = self.fretboard_region
-        fb_center_x = fb_x + fb_w / 2
-        
         # Hand on the left side of fretboard is typically fretting hand
-        return wrist_x < fb_center_x
-    
-    def _find_closest_string(self, position: Tuple[int, int]) -> Optional[int]:
-        """
-        Find the closest string to a given position
-        
-        Args:
-            position: (x, y) position in pixels
-            
-        Returns:
-            String index (0-5) or None
-        """
-        if not self.string_lines:
-            return None
-        
-        x, y = position
-        min_distance = float('inf')
-        closest_string = None
-        
-        for string_idx, string_line in enumerate(self.string_lines):
-            x1, y1, x2, y2 = string_line
-            
-            # Calculate distance from point to line segment
-            distance = self._point_to_line_distance(x, y, x1, y1, x2, y2)
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_string = string_idx
-        
-        # Only return if distance is reasonable (within 30 pixels)
-        if min_distance < 30:
-            return closest_string
-        
-        return None
-    
-    def _find_closest_fret(self, position: Tuple[int, int]) -> Optional[int]:
-        """
-        Find the closest fret to a given position
-        
-        Args:
-            position: (x, y) position in pixels
-            
-        Returns:
-            Fret number (0-NUM_FRETS) or None
-        """
-        if not self.fret_positions:
-            return None
-        
-        x, y = position
-        min_distance = float('inf')
-        closest_fret = None
-        
-        for fret_num, fret_x in enumerate(self.fret_positions):
-            distance = abs(x - fret_x)
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_fret = fret_num
-        
-        # Adjust for "between frets" positions
-        # If finger is between two frets, choose the one closer to nut (lower fret)
-        if closest_fret and closest_fret > 0:
-            # Check if we're past this fret (towards bridge)
-            if x > self.fret_positions[closest_fret]:
-                # Finger is between this fret and the next, so we're pressing this fret
-                pass
-            else:
-                # Finger is between previous fret and this one
-                if closest_fret > 0:
-                    closest_fret -= 1
-        
-        # Ensure fret is within valid range
-        if closest_fret is not None and 0 <= closest_fret <= NUM_FRETS:
-            return closest_fret
-        
-        return None
-    
-    def _point_to_line_distance(self, px: int, py: int, 
-                                 x1: int, y1: int, x2: int, y2: int) -> float:
-        """
-        Calculate distance from point to line segment
-        """
-        # Vector from line start to point
-        dx = x2 - x1
-        dy = y2 - y1
-        
-        if dx == 0 and dy == 0:
-            # Line segment is a point
-            return np.sqrt((px - x1)**2 + (py - y1)**2)
-        
-        # Parameter t of projection of point onto line
-        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
-        
-        # Closest point on line segment
-        closest_x = x1 + t * dx
-        closest_y = y1 + t * dy
-        
-        # Distance from point to closest point
-        return np.sqrt((px - closest_x)**2 + (py - closest_y)**2)
+        return wrist_x < self._fb_center_x
     
     def is_calibrated(self) -> bool:
         """Check if mapper is calibrated"""
@@ -306,36 +396,55 @@ class FingerMapper:
             return played_notes
         
         # Get all pressed positions
-        finger_mappings = fretting_hand['finger_mappings']
+        fingers = fretting_hand.get('fingers')
+        if fingers is None:
+            fingers = self._fingers_from_mappings(fretting_hand['finger_mappings'])
+        pressed = fingers[fingers['pressing']]
         
-        # Group by string (in case multiple fingers on same string, take highest fret)
-        string_frets = {}
+        if len(pressed) == 0:
+            return played_notes
         
-        for finger_name, mapping in finger_mappings.items():
-            string_idx = mapping['string']
-            fret_num = mapping['fret']
-            
-            if string_idx not in string_frets or fret_num > string_frets[string_idx]['fret']:
-                string_frets[string_idx] = {
-                    'fret': fret_num,
-                    'finger': finger_name,
-                    'confidence': mapping['confidence']
-                }
+        # Group by string (in case multiple fingers on same string, take
+        # highest fret; on a tie the first finger, as the sort is stable)
+        ranked = pressed[np.lexsort((-pressed['fret'], pressed['string']))]
+        group_start = np.ones(len(ranked), dtype=bool)
+        group_start[1:] = ranked['string'][1:] != ranked['string'][:-1]
+        best = ranked[group_start]
+        
+        # Strings in the order their first finger appears
+        _, first_seen = np.unique(pressed['string'], return_index=True)
+        best = best[np.argsort(first_seen)]
         
         # Convert to note list
-        for string_idx, info in string_frets.items():
+        for finger, string_idx, fret_num, confidence in zip(
+            best['finger'].tolist(), best['string'].tolist(), best['fret'].tolist(), best['conf'].tolist()
+        ):
             played_notes.append({
                 'string': string_idx,
-                'fret': info['fret'],
-                'finger': info['finger'],
-                'confidence': info['confidence']
+                'fret': fret_num,
+                'finger': FINGER_NAMES[finger],
+                'confidence': confidence
             })
         
         return played_notes
     
-    def draw_finger_mappings(self, frame: np.ndarray, hand_mappings: List[Dict]) -> np.ndarray:
-        """Draw finger-to-fretboard mappings on frame"""
-        annotated = frame.copy()
+    def _fingers_from_mappings(self, finger_mappings: Dict) -> np.ndarray:
+        """FINGER_DTYPE records of the pressing fingers in a finger_mappings dict"""
+        return np.array([
+            (FINGER_NAMES.index(finger_name), mapping['string'], mapping['fret'],
+             *mapping['position'], mapping['confidence'], True)
+            for finger_name, mapping in finger_mappings.items()
+        ], dtype=FINGER_DTYPE)
+    
+    def draw_finger_mappings(self, frame: np.ndarray, hand_mappings: List[Dict],
+                             in_place: bool = False, labels: bool = True) -> np.ndarray:
+        """
+        Draw finger-to-fretboard mappings on frame (on a copy unless in_place)
+        
+        Markers are stamped as a precomputed disk; labels (string/fret text,
+        the costly part) can be left out with labels=False.
+        """
+        annotated = frame if in_place else frame.copy()
         
         for hand_mapping in hand_mappings:
             if not hand_mapping:
@@ -345,15 +454,18 @@ class FingerMapper:
             finger_mappings = hand_mapping.get('finger_mappings', {})
             
             # Choose color based on hand type
-            color = (0, 255, 0) if hand_type == 'fretting' else (255, 165, 0)
+            color = (0, 255, 0) if hand_type == 'fretting' else (0, 165, 255)
             
             for finger_name, mapping in finger_mappings.items():
                 position = mapping['position']
                 string_idx = mapping['string']
                 fret_num = mapping['fret']
                 
-                # Draw circle at finger position
-                cv2.circle(annotated, position, 8, color, -1)
+                # Draw disk at finger position
+                _stamp_disk(annotated, position[0], position[1], color)
+                
+                if not labels:
+                    continue
                 
                 # Draw label
                 label = f"{finger_name[0].upper()}: S{string_idx+1}F{fret_num}"
@@ -369,17 +481,17 @@ class FingerMapper:
         
         return annotated
     
-    def draw_fret_markers(self, frame: np.ndarray) -> np.ndarray:
-        """Draw approximate fret positions for visualization"""
+    def draw_fret_markers(self, frame: np.ndarray, in_place: bool = False) -> np.ndarray:
+        """Draw approximate fret positions for visualization (on a copy unless in_place)"""
         if not self.is_calibrated():
             return frame
         
-        annotated = frame.copy()
+        annotated = frame if in_place else frame.copy()
+        fb_x, fb_y, fb_w, fb_h = self.fretboard_region
         
         # Draw fret lines
         for fret_num, fret_x in enumerate(self.fret_positions):
             if fret_num % 3 == 0:  # Draw every 3rd fret for clarity
-                fb_x, fb_y, fb_w, fb_h = self.fretboard_region
                 cv2.line(
                     annotated,
                     (fret_x, fb_y),
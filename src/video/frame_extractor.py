@@ -18,14 +18,18 @@ class FrameExtractor:
     
     def extract_frames(self, video_path: Path, max_frames=None):
         """
-        Extract frames from video
+        Extract frames from video, decoding one at a time
+        
+        Only the current frame is held in memory, so videos of any length
+        stream through; use extract_frames_list for random access.
         
         Args:
             video_path: Path to video file
             max_frames: Maximum number of frames to extract (None = all)
             
-        Returns:
-            List of (frame, timestamp) tuples
+        Yields:
+            Frame dictionaries with 'frame' (BGR, as decoded), 'timestamp'
+            and 'frame_number'
         """
         video_path = Path(video_path)
         
@@ -45,47 +49,63 @@ class FrameExtractor:
         # Calculate frame skip interval
         frame_interval = max(1, int(original_fps / self.target_fps))
         
-        frames = []
         frame_count = 0
         extracted_count = 0
         
         print(f"Video info: {original_fps:.2f} fps, {total_frames} frames, {duration:.2f}s")
         print(f"Extracting every {frame_interval} frames (target: {self.target_fps} fps)")
         
-        while True:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # Extract frames at target interval
-            if frame_count % frame_interval == 0:
-                timestamp = frame_count / original_fps
+        try:
+            while True:
+                # Extract frames at target interval; skipped frames are only
+                # grabbed (decoder advanced, no pixel conversion or copy)
+                if frame_count % frame_interval != 0:
+                    if not cap.grab():
+                        break
+                    
+                    frame_count += 1
+                    continue
                 
-                # Convert BGR to RGB (OpenCV uses BGR)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                ret, frame = cap.read()
                 
-                frames.append({
-                    'frame': frame_rgb,
+                if not ret:
+                    break
+                
+                timestamp = frame_count / original_fps
+                
+                # Frames stay BGR (OpenCV's order); consumers needing RGB convert
+                yield {
+                    'frame': frame,
                     'timestamp': timestamp,
                     'frame_number': frame_count
-                })
+                }
                 
                 extracted_count += 1
                 
                 if max_frames and extracted_count >= max_frames:
                     break
-            
-            frame_count += 1
+                
+                frame_count += 1
+        finally:
+            cap.release()
+    
+    def extract_frames_list(self, video_path: Path, max_frames=None) -> list:
+        """
+        Extract all frames from video into a list
         
-        cap.release()
+        Args:
+            video_path: Path to video file
+            max_frames: Maximum number of frames to extract (None = all)
+            
+        Returns:
+            List of frame dictionaries (see extract_frames)
+        """
+        frames = list(self.extract_frames(video_path, max_frames))
         
         print(f"Extracted {len(frames)} frames")
         
         return frames
     
     def save_frame(self, frame: np.ndarray, output_path: Path):
-        """Save a single frame as image"""
-        # Convert RGB back to BGR for OpenCV
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        cv2.imwrite(str(output_path), frame_bgr)
\ No newline at end of file
+        """Save a single BGR frame as image"""
+        cv2.imwrite(str(output_path), frame)
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 Fretboard detection and calibration - Phase 2.2
 """
+import threading
 import cv2
 import numpy as np
 from typing import Optional, List, Tuple
@@ -18,15 +19,45 @@ from config.guitar_config import (
 )
 
 
+def _cluster_by_gap(values: np.ndarray, gap: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split sorted values into clusters wherever consecutive values are gap or more apart
+    
+    Args:
+        values: 1-D array sorted ascending
+        gap: Minimum difference that starts a new cluster
+        
+    Returns:
+        (starts, ends) index arrays; cluster i is values[starts[i]:ends[i]]
+    """
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(values) >= gap) + 1))
+    ends = np.append(starts[1:], len(values))
+    return starts, ends
+
+
 class FretboardDetector:
     """Detect and track guitar fretboard in video"""
     
-    def __init__(self, enable_calibration=True):
+    def __init__(self, enable_calibration=True, reuse_threshold=3.0,
+                 roi_padding=40, full_search_interval=30, search_width=640):
         """
         Args:
             enable_calibration: Whether to use multi-frame calibration
+            reuse_threshold: Frames whose 64x64 grayscale thumbnail differs from
+                             the last searched frame's by less than this mean
+                             gray level reuse its search result (0 = search every frame)
+            roi_padding: Pixels added around the last detection to form the
+                         region searched on the following frames
+            full_search_interval: Region searches between full-frame searches
+                                  (0 = always search the full frame)
+            search_width: Frames wider than this are downscaled to this width
+                          before edge detection (None = full resolution)
         """
         self.enable_calibration = enable_calibration
+        self.reuse_threshold = reuse_threshold
+        self.roi_padding = roi_padding
+        self.full_search_interval = full_search_interval
+        self.search_width = search_width
         self.is_calibrated = False
         
         # Calibration state
@@ -37,84 +68,54 @@ class FretboardDetector:
         # Tracking state
         self.last_fretboard = None
         self.detection_failures = 0
+        
+        # Thumbnail and (found_contours, best_candidate) of the last real search
+        self._last_gray_small = None
+        self._last_search = None
+        
+        # (x0, y0, x1, y1) search region around the last detection
+        self._roi = None
+        self._roi_searches = 0
+        
+        # Contrast enhancers, built once: the search one is only used by the
+        # thread running detect_fretboard; CLAHE keeps working buffers, so
+        # detect_strings (run from worker threads) keeps one per thread
+        self._clahe_full = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self._thread_local = threading.local()
+        
+        # Working images of the fretboard search, by image shape (see _scratch_buffer)
+        self._scratch = {}
+        self._close_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
     
     def detect_fretboard(self, frame: np.ndarray) -> Optional[dict]:
         """
         Detect fretboard region in frame
         
         Args:
-            frame: RGB image frame
+            frame: BGR image frame
             
         Returns:
             Dictionary with fretboard info or None if not detected
         """
-        h, w = frame.shape[:2]
-        frame_area = h * w
-        
         # If calibrated, use calibrated region
         if self.is_calibrated and self.calibrated_region is not None:
             return self._use_calibrated_region(frame)
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-        
-        # Enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
-        
-        # Apply bilateral filter to reduce noise while keeping edges
-        blurred = cv2.bilateralFilter(enhanced, 9, 75, 75)
-        
-        # Multi-scale edge detection
-        edges1 = cv2.Canny(blurred, 30, 90)
-        edges2 = cv2.Canny(blurred, 50, 150)
-        edges = cv2.bitwise_or(edges1, edges2)
-        
-        # Morphological operations to connect edges
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        edges = cv2.dilate(edges, kernel, iterations=1)
-        edges = cv2.erode(edges, kernel, iterations=1)
-        
-        # Find contours
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
+        # The fretboard moves slowly: a frame that looks like the last
+        # searched one gets the same search result
+        thumb = self._frame_thumbnail(frame) if self.reuse_threshold else None
+        if (thumb is not None and self._last_gray_small is not None
+                and float(cv2.absdiff(thumb, self._last_gray_small).mean()) < self.reuse_threshold):
+            found_contours, best_candidate = self._last_search
+        else:
+            found_contours, best_candidate = self._search_near_last(frame)
+            self._last_gray_small = thumb
+            self._last_search = (found_contours, best_candidate)
+        
+        if not found_contours:
             self.detection_failures += 1
             return None
         
-        # Find the best fretboard candidate
-        best_candidate = None
-        best_score = 0
-        
-        for contour in contours:
-            # Get bounding rectangle
-            x, y, w_rect, h_rect = cv2.boundingRect(contour)
-            area = w_rect * h_rect
-            
-            # Filter by area
-            area_ratio = area / frame_area
-            if area_ratio < FRETBOARD_MIN_AREA_RATIO or area_ratio > FRETBOARD_MAX_AREA_RATIO:
-                continue
-            
-            # Filter by aspect ratio (fretboard should be wider than tall)
-            aspect_ratio = w_rect / h_rect if h_rect > 0 else 0
-            if aspect_ratio < FRETBOARD_ASPECT_RATIO_MIN or aspect_ratio > FRETBOARD_ASPECT_RATIO_MAX:
-                continue
-            
-            # Score this candidate
-            score = self._score_fretboard_candidate(
-                (x, y, w_rect, h_rect), area_ratio, aspect_ratio, frame
-            )
-            
-            if score > best_score:
-                best_score = score
-                best_candidate = {
-                    'bbox': (x, y, w_rect, h_rect),
-                    'area_ratio': area_ratio,
-                    'aspect_ratio': aspect_ratio,
-                    'score': score
-                }
-        
         if best_candidate:
             self.detection_failures = 0
             self.last_fretboard = best_candidate
@@ -133,41 +134,189 @@ class FretboardDetector:
         
         return None
     
-    def _score_fretboard_candidate(self, bbox: Tuple, area_ratio: float, 
-                                   aspect_ratio: float, frame: np.ndarray) -> float:
+    def _search_near_last(self, frame: np.ndarray) -> Tuple[bool, Optional[dict]]:
         """
-        Score a fretboard candidate based on multiple factors
+        Search only the region around the last detection when there is one
         
-        Higher score = better candidate
+        The fretboard drifts little between frames, so most searches need a
+        small fraction of the pixels. A full-frame search still runs every
+        full_search_interval searches and whenever the region holds no
+        candidate, so a fretboard that moved away is found again.
+        
+        Returns:
+            (whether any contours were found, best candidate or None)
         """
-        score = 0.0
+        if self._roi is not None and self._roi_searches < self.full_search_interval:
+            self._roi_searches += 1
+            found_contours, best_candidate = self._search_fretboard(frame, self._roi)
+            
+            if best_candidate:
+                self._roi = self._padded_roi(best_candidate['bbox'], frame.shape)
+                return found_contours, best_candidate
+        
+        self._roi_searches = 0
+        found_contours, best_candidate = self._search_fretboard(frame)
+        self._roi = self._padded_roi(best_candidate['bbox'], frame.shape) if best_candidate else None
+        
+        return found_contours, best_candidate
+    
+    def _padded_roi(self, bbox: Tuple, frame_shape: Tuple) -> Tuple:
+        """Search region around a bbox, clipped to the frame"""
+        x, y, w, h = bbox
+        pad = self.roi_padding
+        
+        return (max(0, x - pad), max(0, y - pad),
+                min(frame_shape[1], x + w + pad), min(frame_shape[0], y + h + pad))
+    
+    def _search_fretboard(self, frame: np.ndarray, roi: Optional[Tuple] = None) -> Tuple[bool, Optional[dict]]:
+        """
+        Search a frame for the best fretboard candidate
         
+        Args:
+            frame: BGR image frame
+            roi: (x0, y0, x1, y1) region to search (None = full frame);
+                 candidates are still measured against the full frame
+            
+        Returns:
+            (whether any contours were found, best candidate or None)
+        """
+        h, w = frame.shape[:2]
+        frame_area = h * w
+        
+        x0, y0 = 0, 0
+        region = frame
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            region = frame[y0:y1, x0:x1]
+        
+        # Convert to grayscale (all working images go into reused buffers)
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY, dst=self._scratch_buffer('gray', region.shape[:2]))
+        
+        # Locating the fretboard needs little resolution: edge detection runs
+        # at (at most) search_width wide, touching scale**2 times fewer pixels
+        # and seeing the same image scale whatever the video resolution; region
+        # searches use the full frame's factor
+        scale = max(1.0, w / self.search_width) if self.search_width else 1.0
+        if scale > 1:
+            small_shape = (max(1, round(gray.shape[0] / scale)), max(1, round(gray.shape[1] / scale)))
+            gray = cv2.resize(gray, small_shape[::-1], dst=self._scratch_buffer('small', small_shape),
+                              interpolation=cv2.INTER_AREA)
+        
+        # Enhance contrast
+        enhanced = self._clahe_full.apply(gray, dst=self._scratch_buffer('enhanced', gray.shape))
+        
+        # Reduce noise (separable Gaussian; the fretboard outline is a coarse
+        # edge that needs no edge-preserving filter)
+        blurred = cv2.GaussianBlur(enhanced, (5, 5), 1.2, dst=self._scratch_buffer('blurred', gray.shape))
+        
+        # Single edge detection pass with exact gradient magnitude, thresholds
+        # spanning the former 30/90 and 50/150 pair
+        edges = cv2.Canny(blurred, 40, 120, edges=self._scratch_buffer('edges', gray.shape), L2gradient=True)
+        
+        # Morphological closing (dilate, then erode) to connect edges, in place
+        edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, self._close_kernel, dst=edges)
+        
+        # Find contours
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        if not contours:
+            return False, None
+        
+        # Bounding rectangles of all contours as one (contours, 4) array,
+        # scaled back up, in frame coordinates
+        rects = np.array([cv2.boundingRect(contour) for contour in contours], dtype=np.float64)
+        rects = np.round(rects * scale).astype(np.int64)
+        rects[:, 0] += x0
+        rects[:, 1] += y0
+        
+        # Filter by area
+        area_ratios = rects[:, 2] * rects[:, 3] / frame_area
+        keep = (area_ratios >= FRETBOARD_MIN_AREA_RATIO) & (area_ratios <= FRETBOARD_MAX_AREA_RATIO)
+        
+        # Filter by aspect ratio (fretboard should be wider than tall)
+        aspect_ratios = np.divide(rects[:, 2], rects[:, 3], out=np.zeros(len(rects)), where=rects[:, 3] > 0)
+        keep &= (aspect_ratios >= FRETBOARD_ASPECT_RATIO_MIN) & (aspect_ratios <= FRETBOARD_ASPECT_RATIO_MAX)
+        
+        if not keep.any():
+            return True, None
+        
+        # Score all candidates; the best is the first highest score above 0
+        rects, area_ratios, aspect_ratios = rects[keep], area_ratios[keep], aspect_ratios[keep]
+        scores = self._score_fretboard_candidates(rects, area_ratios, aspect_ratios, w, h)
+        best = int(np.argmax(scores))
+        
+        if scores[best] <= 0:
+            return True, None
+        
+        return True, {
+            'bbox': tuple(rects[best].tolist()),
+            'area_ratio': float(area_ratios[best]),
+            'aspect_ratio': float(aspect_ratios[best]),
+            'score': float(scores[best])
+        }
+    
+    def _scratch_buffer(self, name: str, shape: Tuple) -> np.ndarray:
+        """
+        Reusable uint8 working image of the fretboard search
+        
+        Full and region searches use a handful of sizes that persist across
+        frames; a region that moved brings new sizes, so stale ones are
+        dropped once more than a few have piled up.
+        """
+        key = (name, tuple(shape))
+        buffer = self._scratch.get(key)
+        
+        if buffer is None:
+            if len(self._scratch) >= 16:
+                self._scratch.clear()
+            buffer = self._scratch[key] = np.empty(shape, dtype=np.uint8)
+        
+        return buffer
+    
+    def _frame_thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """64x64 grayscale thumbnail of a frame for the search reuse check"""
+        small = cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    
+    def _score_fretboard_candidates(self, bboxes: np.ndarray, area_ratios: np.ndarray,
+                                    aspect_ratios: np.ndarray, frame_w: int, frame_h: int) -> np.ndarray:
+        """
+        Score fretboard candidates based on multiple factors, all at once
+        
+        Higher score = better candidate
+        
+        Args:
+            bboxes: (N, 4) array of (x, y, w, h)
+            area_ratios: (N,) bbox area / frame area
+            aspect_ratios: (N,) bbox width / height
+            frame_w: Frame width
+            frame_h: Frame height
+            
+        Returns:
+            (N,) array of scores
+        """
         # Prefer regions in center or slightly off-center
-        x, y, w_rect, h_rect = bbox
-        frame_h, frame_w = frame.shape[:2]
-        center_x = x + w_rect / 2
-        center_y = y + h_rect / 2
+        center_x = bboxes[:, 0] + bboxes[:, 2] / 2
+        center_y = bboxes[:, 1] + bboxes[:, 3] / 2
         
         # Horizontal centering (slight preference for center)
-        h_center_dist = abs(center_x - frame_w / 2) / frame_w
-        score += (1 - h_center_dist) * 20
+        h_center_dist = np.abs(center_x - frame_w / 2) / frame_w
+        score = (1 - h_center_dist) * 20
         
         # Vertical position (prefer middle to upper-middle)
         v_position = center_y / frame_h
-        if 0.3 < v_position < 0.7:
-            score += 30
-        elif 0.2 < v_position < 0.8:
-            score += 20
+        score = score + np.where((0.3 < v_position) & (v_position < 0.7), 30,
+                                 np.where((0.2 < v_position) & (v_position < 0.8), 20, 0))
         
         # Area preference (moderate size)
         optimal_area_ratio = 0.4
-        area_score = 1 - abs(area_ratio - optimal_area_ratio) / optimal_area_ratio
-        score += area_score * 25
+        area_score = 1 - np.abs(area_ratios - optimal_area_ratio) / optimal_area_ratio
+        score = score + area_score * 25
         
         # Aspect ratio preference
         optimal_aspect = 3.5
-        aspect_score = 1 - abs(aspect_ratio - optimal_aspect) / optimal_aspect
-        score += aspect_score * 25
+        aspect_score = 1 - np.abs(aspect_ratios - optimal_aspect) / optimal_aspect
+        score = score + aspect_score * 25
         
         return score
     
@@ -177,15 +326,14 @@ class FretboardDetector:
         
         # Check if we have enough frames
         if len(self.calibration_history) >= CALIBRATION_FRAMES_REQUIRED:
-            # Check consistency
-            bboxes = [f['bbox'] for f in self.calibration_history]
+            # Check consistency: one (frames, 4) array of the bboxes
+            bboxes = np.array([f['bbox'] for f in self.calibration_history], dtype=np.int64)
             
-            # Calculate average bbox
-            avg_bbox = tuple(int(np.mean([b[i] for b in bboxes])) for i in range(4))
+            # Calculate average bbox (truncated like int())
+            avg_bbox = tuple(bboxes.mean(axis=0).astype(np.int64).tolist())
             
             # Calculate variance to check consistency
-            variances = [np.std([b[i] for b in bboxes]) for i in range(4)]
-            max_variance = max(variances)
+            max_variance = float(bboxes.std(axis=0).max())
             
             # If variance is low enough, we're calibrated
             threshold = 50  # pixels
@@ -212,7 +360,7 @@ class FretboardDetector:
         Detect string lines within the fretboard region
         
         Args:
-            frame: RGB image frame
+            frame: BGR image frame
             fretboard_info: Fretboard detection info
             
         Returns:
@@ -227,11 +375,10 @@ class FretboardDetector:
         fretboard_roi = frame[y:y+h, x:x+w]
         
         # Convert to grayscale
-        gray_roi = cv2.cvtColor(fretboard_roi, cv2.COLOR_RGB2GRAY)
+        gray_roi = cv2.cvtColor(fretboard_roi, cv2.COLOR_BGR2GRAY)
         
         # Enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray_roi)
+        enhanced = self._roi_clahe().apply(gray_roi)
         
         # Apply edge detection (focus on horizontal edges for strings)
         edges = cv2.Canny(enhanced, 50, 150)
@@ -249,86 +396,63 @@ class FretboardDetector:
         if lines is None:
             return None
         
-        # Filter for mostly horizontal lines (strings)
-        string_candidates = []
+        # Filter for mostly horizontal lines (strings), all lines at once
+        segments = lines.reshape(-1, 4)
         
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            
-            # Calculate angle
-            angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
-            
-            # Keep lines that are mostly horizontal (within 15 degrees)
-            if angle < 15 or angle > 165:
-                # Convert back to frame coordinates
-                string_candidates.append((
-                    x + x1, y + y1,
-                    x + x2, y + y2,
-                    (y1 + y2) / 2  # Average y position
-                ))
+        # Calculate angle
+        angle = np.abs(np.arctan2(segments[:, 3] - segments[:, 1], segments[:, 2] - segments[:, 0]) * 180 / np.pi)
+        
+        # Keep lines that are mostly horizontal (within 15 degrees)
+        segments = segments[(angle < 15) | (angle > 165)].astype(np.int64)
         
         # Group lines by y-position to find distinct strings
-        if not string_candidates:
+        if len(segments) == 0:
             return None
         
-        # Sort by y position
-        string_candidates.sort(key=lambda l: l[4])
+        # Sort by y position (average y, in fretboard coordinates)
+        y_mid = (segments[:, 1] + segments[:, 3]) / 2
+        order = np.argsort(y_mid, kind='stable')
+        segments = segments[order]
+        y_mid = y_mid[order]
         
-        # Cluster nearby lines (same string)
-        strings = []
-        current_cluster = [string_candidates[0]]
+        # Convert back to frame coordinates
+        segments += (x, y, x, y)
         
-        for i in range(1, len(string_candidates)):
-            prev_y = current_cluster[-1][4]
-            curr_y = string_candidates[i][4]
-            
-            # If y-positions are close, same string
-            if abs(curr_y - prev_y) < h * 0.05:  # Within 5% of fretboard height
-                current_cluster.append(string_candidates[i])
-            else:
-                # New string, save previous cluster
-                # Average the lines in this cluster
-                avg_line = self._average_lines(current_cluster)
-                strings.append(avg_line)
-                current_cluster = [string_candidates[i]]
-        
-        # Don't forget the last cluster
-        if current_cluster:
-            avg_line = self._average_lines(current_cluster)
-            strings.append(avg_line)
+        # Cluster nearby lines (same string): a new string starts wherever
+        # the gap to the previous line reaches 5% of fretboard height
+        starts, ends = _cluster_by_gap(y_mid, h * 0.05)
+        
+        # Average the lines in each cluster (truncated like int())
+        averages = (np.add.reduceat(segments, starts, axis=0) / (ends - starts)[:, None]).astype(np.int64)
         
         # Keep only the best NUM_STRINGS candidates
-        if len(strings) > NUM_STRINGS:
-            # Sort by length and keep longest
-            strings.sort(key=lambda l: np.sqrt((l[2]-l[0])**2 + (l[3]-l[1])**2), reverse=True)
-            strings = strings[:NUM_STRINGS]
+        if len(averages) > NUM_STRINGS:
+            # Sort by length and keep longest (ties keep cluster order)
+            lengths = np.sqrt((averages[:, 2] - averages[:, 0])**2 + (averages[:, 3] - averages[:, 1])**2)
+            averages = averages[np.argsort(-lengths, kind='stable')[:NUM_STRINGS]]
         
         # Sort by y-position (top to bottom)
-        strings.sort(key=lambda l: (l[1] + l[3]) / 2)
+        averages = averages[np.argsort((averages[:, 1] + averages[:, 3]) / 2, kind='stable')]
         
-        return strings
+        return [tuple(line) for line in averages.tolist()]
     
-    def _average_lines(self, lines: List[Tuple]) -> Tuple:
-        """Average multiple line segments"""
-        if not lines:
-            return None
-        
-        avg_x1 = int(np.mean([l[0] for l in lines]))
-        avg_y1 = int(np.mean([l[1] for l in lines]))
-        avg_x2 = int(np.mean([l[2] for l in lines]))
-        avg_y2 = int(np.mean([l[3] for l in lines]))
-        
-        return (avg_x1, avg_y1, avg_x2, avg_y2)
+    def _roi_clahe(self):
+        """This thread's contrast enhancer for string detection"""
+        clahe = getattr(self._thread_local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+            self._thread_local.clahe = clahe
+        return clahe
     
-    def draw_fretboard_region(self, frame: np.ndarray, fretboard_info: dict) -> np.ndarray:
-        """Draw detected fretboard region on frame"""
-        annotated_frame = frame.copy()
+    def draw_fretboard_region(self, frame: np.ndarray, fretboard_info: dict, in_place: bool = False) -> np.ndarray:
+        """Draw detected fretboard region on frame (on a copy unless in_place)"""
+        annotated_frame = frame if in_place else frame.copy()
         
         if fretboard_info:
             x, y, w, h = fretboard_info['bbox']
             
             # Color based on calibration status
-            color = (0, 255, 0) if fretboard_info.get('calibrated', False) else (255, 165, 0)
+            color = (0, 255, 0) if fretboard_info.get('calibrated', False) else (0, 165, 255)
             thickness = 3 if fretboard_info.get('calibrated', False) else 2
             
             cv2.rectangle(annotated_frame, (x, y), (x + w, y + h), color, thickness)
@@ -349,9 +473,9 @@ class FretboardDetector:
         
         return annotated_frame
     
-    def draw_strings(self, frame: np.ndarray, strings: List[Tuple]) -> np.ndarray:
-        """Draw detected string lines on frame"""
-        annotated_frame = frame.copy()
+    def draw_strings(self, frame: np.ndarray, strings: List[Tuple], in_place: bool = False) -> np.ndarray:
+        """Draw detected string lines on frame (on a copy unless in_place)"""
+        annotated_frame = frame if in_place else frame.copy()
         
         if strings:
             string_names = ['e', 'B', 'G', 'D', 'A', 'E']  # High to low
@@ -360,7 +484,7 @@ class FretboardDetector:
                 x1, y1, x2, y2 = string_line
                 
                 # Draw string line
-                cv2.line(annotated_frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+                cv2.line(annotated_frame, (x1, y1), (x2, y2), (255, 255, 0), 2)
                 
                 # Add string label
                 if i < len(string_names):
@@ -371,7 +495,7 @@ class FretboardDetector:
                         (x1 - 20, y1 + 5),
                         cv2.FONT_HERSHEY_SIMPLEX,
                         0.5,
-                        (0, 255, 255),
+                        (255, 255, 0),
                         2
                     )
         
@@ -382,4 +506,5 @@ class FretboardDetector:
         self.is_calibrated = False
         self.calibration_history.clear()
         self.calibrated_region = None
-        self.detection_failures = 0
\ No newline at end of file
+        self.detection_failures = 0
+        self._roi = None
\ No newline at end of file
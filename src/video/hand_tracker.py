@@ -3,7 +3,6 @@ Hand tracking using MediaPipe
 """
 import cv2
 import numpy as np
-import mediapipe as mp
 from typing import List, Dict, Optional
 
 
@@ -20,6 +19,9 @@ class HandTracker:
             min_tracking_confidence: Minimum confidence for hand tracking
             max_num_hands: Maximum number of hands to detect
         """
+        # Imported lazily: MediaPipe graph libraries are slow to load
+        import mediapipe as mp
+        
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
@@ -30,19 +32,31 @@ class HandTracker:
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
+        
+        # RGB copy of the current frame for MediaPipe, reused across frames
+        self._rgb = None
     
     def detect_hands(self, frame: np.ndarray) -> List[Dict]:
         """
         Detect hands in frame
         
         Args:
-            frame: RGB image frame
+            frame: BGR image frame
             
         Returns:
             List of detected hands with landmarks
         """
-        # Process frame
-        results = self.hands.process(frame)
+        # MediaPipe expects RGB; convert into the same buffer every frame
+        if self._rgb is None or self._rgb.shape != frame.shape:
+            self._rgb = np.empty_like(frame)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        
+        # Process frame; a read-only input lets MediaPipe use it without copying
+        self._rgb.flags.writeable = False
+        try:
+            results = self.hands.process(self._rgb)
+        finally:
+            self._rgb.flags.writeable = True
         
         detected_hands = []
         
@@ -55,15 +69,12 @@ class HandTracker:
                 hand_label = handedness.classification[0].label  # "Left" or "Right"
                 hand_score = handedness.classification[0].score
                 
-                # Extract landmark coordinates
-                landmarks = []
-                for landmark in hand_landmarks.landmark:
-                    landmarks.append({
-                        'x': landmark.x,
-                        'y': landmark.y,
-                        'z': landmark.z,  # Relative depth
-                        'visibility': landmark.visibility if hasattr(landmark, 'visibility') else 1.0
-                    })
+                # Extract landmark coordinates as one (21, 4) array of
+                # normalized x, y, relative depth z and visibility
+                landmarks = np.array([
+                    (p.x, p.y, p.z, getattr(p, 'visibility', 1.0))
+                    for p in hand_landmarks.landmark
+                ], dtype=np.float32)
                 
                 detected_hands.append({
                     'label': hand_label,
@@ -74,7 +85,7 @@ class HandTracker:
         
         return detected_hands
     
-    def get_fingertip_positions(self, hand_data: Dict) -> Dict[str, tuple]:
+    def get_fingertip_positions(self, hand_data: Dict) -> Dict[str, np.ndarray]:
         """
         Extract fingertip positions from hand landmarks
         
@@ -89,37 +100,37 @@ class HandTracker:
             hand_data: Hand data from detect_hands()
             
         Returns:
-            Dictionary of finger names to (x, y, z) coordinates
+            Dictionary of finger names to (x, y, z) coordinates (views into the landmarks)
         """
         landmarks = hand_data['landmarks']
         
         fingertips = {
-            'thumb': (landmarks[4]['x'], landmarks[4]['y'], landmarks[4]['z']),
-            'index': (landmarks[8]['x'], landmarks[8]['y'], landmarks[8]['z']),
-            'middle': (landmarks[12]['x'], landmarks[12]['y'], landmarks[12]['z']),
-            'ring': (landmarks[16]['x'], landmarks[16]['y'], landmarks[16]['z']),
-            'pinky': (landmarks[20]['x'], landmarks[20]['y'], landmarks[20]['z'])
+            'thumb': landmarks[4, :3],
+            'index': landmarks[8, :3],
+            'middle': landmarks[12, :3],
+            'ring': landmarks[16, :3],
+            'pinky': landmarks[20, :3]
         }
         
         return fingertips
     
-    def get_wrist_position(self, hand_data: Dict) -> tuple:
-        """Get wrist position (landmark 0)"""
-        landmarks = hand_data['landmarks']
-        return (landmarks[0]['x'], landmarks[0]['y'], landmarks[0]['z'])
+    def get_wrist_position(self, hand_data: Dict) -> np.ndarray:
+        """Get wrist position (landmark 0) as an (x, y, z) view"""
+        return hand_data['landmarks'][0, :3]
     
-    def draw_hands_on_frame(self, frame: np.ndarray, hands: List[Dict]) -> np.ndarray:
+    def draw_hands_on_frame(self, frame: np.ndarray, hands: List[Dict], in_place: bool = False) -> np.ndarray:
         """
         Draw hand landmarks on frame for visualization
         
         Args:
-            frame: RGB image frame
+            frame: BGR image frame
             hands: List of detected hands
+            in_place: Draw directly on frame instead of on a copy
             
         Returns:
             Frame with hand landmarks drawn
         """
-        annotated_frame = frame.copy()
+        annotated_frame = frame if in_place else frame.copy()
         
         for hand in hands:
             # Draw landmarks
@@ -132,9 +143,9 @@ class HandTracker:
             )
             
             # Add label
-            wrist = hand['landmarks'][0]
+            wrist_x, wrist_y = hand['landmarks'][0, :2].tolist()
             h, w, _ = annotated_frame.shape
-            label_pos = (int(wrist['x'] * w), int(wrist['y'] * h) - 20)
+            label_pos = (int(wrist_x * w), int(wrist_y * h) - 20)
             
             cv2.putText(
                 annotated_frame,
@@ -148,6 +159,10 @@ class HandTracker:
         
         return annotated_frame
     
+    def reset(self):
+        """Forget tracked hands so the next frame starts a new video"""
+        self.hands.reset()
+    
     def close(self):
         """Release MediaPipe resources"""
         self.hands.close()
\ No newline at end of file
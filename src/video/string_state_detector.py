@@ -112,7 +112,7 @@ class StringStateDetector:
             return hands[0]
         
         # Choose hand with rightmost wrist position
-        rightmost_hand = max(hands, key=lambda h: h['landmarks'][0]['x'])
+        rightmost_hand = max(hands, key=lambda h: float(h['landmarks'][0, 0]))
         return rightmost_hand
     
     def _get_picking_position(self, hand: Dict, frame_w: int, frame_h: int) -> Tuple[int, int]:
@@ -123,10 +123,10 @@ class StringStateDetector:
         
         # Use index fingertip (landmark 8) as picking point
         # In actual playing, this is close to where pick makes contact
-        index_tip = landmarks[8]
+        tip_x, tip_y = landmarks[8, :2].tolist()
         
-        x = int(index_tip['x'] * frame_w)
-        y = int(index_tip['y'] * frame_h)
+        x = int(tip_x * frame_w)
+        y = int(tip_y * frame_h)
         
         return (x, y)
     
@@ -329,9 +329,10 @@ class StringStateDetector:
     def draw_string_activity(self, 
                             frame: np.ndarray,
                             string_activity: Dict,
-                            string_lines: List[Tuple]) -> np.ndarray:
-        """Draw string activity visualization"""
-        annotated = frame.copy()
+                            string_lines: List[Tuple],
+                            in_place: bool = False) -> np.ndarray:
+        """Draw string activity visualization (on a copy unless in_place)"""
+        annotated = frame if in_place else frame.copy()
         
         if not string_activity or not string_lines:
             return annotated
@@ -344,7 +345,7 @@ class StringStateDetector:
             if string_idx < len(string_lines):
                 x1, y1, x2, y2 = string_lines[string_idx]
                 # Draw thick line for active strings
-                cv2.line(annotated, (x1, y1), (x2, y2), (0, 255, 255), 4)
+                cv2.line(annotated, (x1, y1), (x2, y2), (255, 255, 0), 4)
         
         # Draw picking position
         if picking_detected and 'picking_position' in string_activity:
@@ -378,7 +379,7 @@ class StringStateDetector:
                 (10, frame.shape[0] - 20),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.7,
-                (0, 255, 255),
+                (255, 255, 0),
                 2
             )
         
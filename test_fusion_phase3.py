@@ -2,6 +2,7 @@
 """
 Test script for Phase 3: Complete multimodal fusion pipeline
 """
+import logging
 import sys
 from pathlib import Path
 import json
@@ -188,6 +189,9 @@ def compare_modes(video_path: str):
 
 
 if __name__ == "__main__":
+    # Pipeline progress goes through logging; show it as plain lines
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     if len(sys.argv) < 2:
         print("Usage: python test_phase3_fusion.py <video_file> [mode] [--compare]")
         print("\nModes:")
@@ -36,7 +36,7 @@ def test_complete_phase2(video_path: str, max_frames=100):
     
     # Extract frames
     print("\n[2/7] Extracting video frames...")
-    frames = extractor.extract_frames(video_path, max_frames=max_frames)
+    frames = extractor.extract_frames_list(video_path, max_frames=max_frames)
     
     if not frames:
         print("Error: No frames extracted")
@@ -122,15 +122,15 @@ def test_complete_phase2(video_path: str, max_frames=100):
                 'strumming': string_activity['strumming']
             })
         
-        # Visualize everything
+        # Visualize everything (one copy of the frame, drawn on in place)
         annotated = frame.copy()
-        annotated = fretboard_detector.draw_fretboard_region(annotated, fretboard)
+        fretboard_detector.draw_fretboard_region(annotated, fretboard, in_place=True)
         if strings:
-            annotated = fretboard_detector.draw_strings(annotated, strings)
-        annotated = finger_mapper.draw_fret_markers(annotated)
-        annotated = hand_tracker.draw_hands_on_frame(annotated, hands)
-        annotated = finger_mapper.draw_finger_mappings(annotated, hand_mappings)
-        annotated = string_detector.draw_string_activity(annotated, string_activity, strings)
+            fretboard_detector.draw_strings(annotated, strings, in_place=True)
+        finger_mapper.draw_fret_markers(annotated, in_place=True)
+        hand_tracker.draw_hands_on_frame(annotated, hands, in_place=True)
+        finger_mapper.draw_finger_mappings(annotated, hand_mappings, in_place=True)
+        string_detector.draw_string_activity(annotated, string_activity, strings, in_place=True)
         
         # Add comprehensive status overlay
         y_offset = 30